@@ -15,13 +15,17 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # JSON encoder for responses (orjson when installed, stdlib otherwise)
+    from app.utils.json_provider import get_json_provider_class
+    app.json = get_json_provider_class(app.config.get('JSON_PROVIDER', 'orjson'))(app)
+    
     # Enable CORS for all routes with more specific configuration
     CORS(app, resources={
         r"/*": {
             "origins": "*",
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-            "allow_headers": ["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"],
-            "expose_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With", "If-None-Match"],
+            "expose_headers": ["Content-Type", "Authorization", "ETag"],
             "supports_credentials": True,
             "max_age": 3600
         }
@@ -55,4 +59,16 @@ def create_app(config_class=Config):
     app.register_blueprint(manager_bp, url_prefix='/api/manager')
     app.register_blueprint(wallet_bp, url_prefix='/api')
     
+    # Compress large responses (gzip/brotli) according to Accept-Encoding
+    from app.utils.compression import init_compression
+    init_compression(app)
+    
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
+    # Background sender for the email outbox (skipped in tests and CLI commands)
+    from app.services.email_service import EmailService
+    EmailService.start_worker(app)
+    
     return app
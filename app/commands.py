@@ -0,0 +1,147 @@
+import click
+from datetime import datetime
+from flask import current_app
+from flask.cli import AppGroup
+from app.services.credit_service import CreditService
+from app.services.wallet_service import WalletService
+from app.services.email_service import EmailService
+from app.services.invitation_service import InvitationService
+from app.utils.query_plan import explain, full_scans
+from app.models import (
+    CreditRequest, CreditRequestStatus, Employee, EmployeeInvitation, Investment,
+    Payment, PaymentStatus, Wallet, WalletTransaction
+)
+from app.models.invitation import InvitationStatus
+from sqlalchemy import select
+import time
+
+funding_cli = AppGroup('funding', help='Manutenção dos totais de financiamento das solicitações de crédito.')
+payments_cli = AppGroup('payments', help='Processamento de pagamentos de dividendos/juros.')
+email_cli = AppGroup('email', help='Envio das mensagens da outbox de emails.')
+queries_cli = AppGroup('queries', help='Verificação dos planos de execução das consultas dos serviços.')
+invitations_cli = AppGroup('invitations', help='Manutenção dos convites de empresas e funcionários.')
+
+def _print_mismatches(mismatches):
+    for m in mismatches:
+        click.echo(
+            f"Solicitação #{m['id']}: funded_amount={m['funded_amount']:.2f} "
+            f"(esperado {m['expected_funded_amount']:.2f}), investor_count={m['investor_count']} "
+            f"(esperado {m['expected_investor_count']})"
+        )
+
+@funding_cli.command('verify')
+def verify_funding():
+    """Verifica funded_amount/investor_count contra a tabela de investimentos."""
+    mismatches = CreditService.reconcile_funding()
+    _print_mismatches(mismatches)
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} solicitações com totais divergentes")
+    click.echo("Todos os totais de financiamento estão corretos.")
+
+@funding_cli.command('backfill')
+def backfill_funding():
+    """Recalcula funded_amount/investor_count a partir da tabela de investimentos."""
+    mismatches = CreditService.reconcile_funding(fix=True)
+    _print_mismatches(mismatches)
+    click.echo(f"{len(mismatches)} solicitações corrigidas.")
+
+@payments_cli.command('process-due')
+@click.option('--as-of', type=click.DateTime(), default=None, help='Processa pagamentos vencidos até esta data (por omissão, agora).')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None, help='Número de pagamentos por lote.')
+@click.option('--workers', type=click.IntRange(min=1), default=1, help='Número de processos, cada um com uma partição das carteiras (Postgres/MySQL; no SQLite é sempre 1).')
+def process_due_payments(as_of, batch_size, workers):
+    """Liquida os pagamentos pendentes vencidos, em lotes retomáveis."""
+    summary = WalletService.process_due_payments_parallel(as_of, batch_size, workers)
+    click.echo(
+        f"{summary['processed']} pagamentos processados em {summary['batches']} lotes com {summary['workers']} processo(s) "
+        f"(Kzs {summary['total_amount']:.2f}) em {summary['elapsed_seconds']}s "
+        f"- {summary['payments_per_second'] or 0} pagamentos/s"
+    )
+
+@email_cli.command('drain')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None, help='Número de mensagens por lote.')
+@click.option('--loop', is_flag=True, help='Continua a verificar a outbox até ser interrompido.')
+def drain_email_outbox(batch_size, loop):
+    """Envia as mensagens pendentes da outbox (com novas tentativas e backoff)."""
+    while True:
+        summary = EmailService.drain_all(batch_size)
+        click.echo(
+            f"{summary['sent']} enviados, {summary['retried']} reagendados, "
+            f"{summary['failed']} falhados"
+        )
+        if not loop:
+            break
+        time.sleep(current_app.config['EMAIL_OUTBOX_POLL_SECONDS'])
+
+@invitations_cli.command('expire')
+@click.option('--loop', is_flag=True, help='Repete a varredura até ser interrompido.')
+@click.option('--interval', type=click.IntRange(min=1), default=3600, help='Segundos entre varreduras com --loop.')
+def expire_invitations(loop, interval):
+    """Marca como expirados os convites pendentes cujo prazo já passou."""
+    while True:
+        expired = InvitationService.expire_invitations()
+        click.echo(f"{expired['company']} convites de empresa e {expired['employee']} de funcionário expirados.")
+        if not loop:
+            break
+        time.sleep(interval)
+
+def _service_queries():
+    """Consultas dos serviços (Credit/Wallet/Invitation) que devem usar um índice"""
+    now = datetime.utcnow()
+    return [
+        ('solicitações do funcionário por estado', select(CreditRequest.id).where(
+            CreditRequest.employee_id == 1, CreditRequest.status == CreditRequestStatus.PENDING)),
+        ('solicitações da empresa', select(CreditRequest.id).join(Employee).where(
+            Employee.company_id == 1).order_by(CreditRequest.created_at.desc())),
+        ('feed de oportunidades', select(CreditRequest.id).where(
+            CreditRequest.status == CreditRequestStatus.APPROVED,
+            CreditRequest.amount - CreditRequest.funded_amount > 0,
+            CreditRequest.employee_id != 1
+        ).order_by(CreditRequest.created_at.desc(), CreditRequest.id.desc()).limit(20)),
+        ('investimentos de uma solicitação', select(Investment.id).where(
+            Investment.credit_request_id == 1, Investment.employee_id == 1)),
+        ('investimentos do funcionário', select(Investment.id).where(Investment.employee_id == 1)),
+        ('pagamentos de um investimento', select(Payment.id).where(
+            Payment.investment_id == 1, Payment.status == PaymentStatus.PENDING
+        ).order_by(Payment.due_date)),
+        ('pagamentos vencidos', WalletService._due_payments_query(now, WalletService.DUE_PAYMENTS_BATCH_SIZE)),
+        ('carteira do funcionário', select(Wallet.id).where(Wallet.employee_id == 1)),
+        ('extrato da carteira', select(WalletTransaction.id).join(Wallet).where(
+            Wallet.employee_id == 1).order_by(WalletTransaction.created_at.desc())),
+        ('extrato da carteira por tipo', select(WalletTransaction.id).where(
+            WalletTransaction.wallet_id == 1,
+            WalletTransaction.type.in_(['dividend', 'interest'])
+        ).order_by(WalletTransaction.created_at.desc(), WalletTransaction.id.desc()).limit(20)),
+        ('convites da empresa', select(EmployeeInvitation.id).where(
+            EmployeeInvitation.company_id == 1).order_by(EmployeeInvitation.created_at.desc())),
+        ('convites pendentes por email', select(EmployeeInvitation.email).where(
+            EmployeeInvitation.company_id == 1,
+            EmployeeInvitation.status == InvitationStatus.PENDING,
+            EmployeeInvitation.email.in_(['a@finco.com', 'b@finco.com']))),
+    ]
+
+@queries_cli.command('check-plans')
+@click.option('--verbose', is_flag=True, help='Mostra o plano completo de cada consulta.')
+def check_query_plans(verbose):
+    """Corre EXPLAIN nas consultas dos serviços e falha se alguma ler uma tabela inteira.
+
+    Deve ser corrido sobre uma base de dados com dados: com tabelas quase vazias
+    alguns planeadores (PostgreSQL, MySQL) preferem a leitura sequencial."""
+    failures = []
+    for name, statement in _service_queries():
+        scans = full_scans(statement)
+        click.echo(f"{'FALHA' if scans else 'ok':5} {name}" + (f" (leitura completa de {', '.join(scans)})" if scans else ''))
+        if verbose:
+            for line in explain(statement):
+                click.echo(f"        {line}")
+        if scans:
+            failures.append(name)
+    if failures:
+        raise click.ClickException(f"{len(failures)} consultas sem índice")
+
+def register_commands(app):
+    app.cli.add_command(funding_cli)
+    app.cli.add_command(payments_cli)
+    app.cli.add_command(email_cli)
+    app.cli.add_command(invitations_cli)
+    app.cli.add_command(queries_cli)
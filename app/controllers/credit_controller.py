@@ -1,6 +1,10 @@
-from flask import jsonify, request
+from flask import request
 from app.services.credit_service import CreditService
 from app.models.credit_request import CreditRequestStatus
+from app.utils.pagination import parse_page_args
+from app.utils.responses import success_response, error_response
+from app.utils.export import parse_export_format, stream_export
+from app.utils.conditional import listing_etag, not_modified, with_etag
 from flask_jwt_extended import get_jwt
 import logging
 
@@ -8,64 +12,45 @@ class CreditController:
     @staticmethod
     def get_all_credit_requests():
         try:
+            export_format = parse_export_format(request.args)
+            if export_format:
+                return stream_export(CreditService.iter_credit_requests(), export_format, 'credit_requests')
+            
             credits = CreditService.get_all_credit_requests()
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Solicitações de crédito encontradas',
-                'data': [credit.to_dict() for credit in credits],
-                'total': len(credits)
-            }), 200
+            return success_response(
+                'Solicitações de crédito encontradas',
+                data=[credit.to_dict() for credit in credits],
+                total=len(credits)
+            )
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar solicitações: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar solicitações: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar solicitações: {str(e)}', 500)
     
     @staticmethod
     def get_credit_requests_by_employee(employee_id):
         try:
             credits = CreditService.get_credit_requests_by_employee(employee_id)
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Solicitações do funcionário encontradas',
-                'data': [credit.to_dict() for credit in credits],
-                'total': len(credits)
-            }), 200
+            return success_response(
+                'Solicitações do funcionário encontradas',
+                data=[credit.to_dict() for credit in credits],
+                total=len(credits)
+            )
         except Exception as e:
             logging.error(f"Erro ao buscar solicitações do funcionário: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar solicitações: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar solicitações: {str(e)}', 500)
     
     @staticmethod
     def get_credit_request_by_id(credit_id):
         try:
             credit = CreditService.get_credit_request_by_id(credit_id)
             if not credit:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 404,
-                    'message': 'Solicitação de crédito não encontrada'
-                }), 404
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Solicitação de crédito encontrada',
-                'data': credit.to_dict()
-            }), 200
+                return error_response('Solicitação de crédito não encontrada', 404)
+            return success_response('Solicitação de crédito encontrada', data=credit.to_dict())
         except Exception as e:
             logging.error(f"Erro ao buscar solicitação: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar solicitação: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar solicitação: {str(e)}', 500)
     
     @staticmethod
     def create_employee_credit_request():
@@ -74,30 +59,18 @@ class CreditController:
             jwt = get_jwt()
             
             if not data:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Dados não fornecidos'
-                }), 400
+                return error_response('Dados não fornecidos', 400)
                 
             # Get employee_id from JWT claims token
             employee_id = jwt.get('employee_id')
             if not employee_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID do funcionário não encontrado no token'
-                }), 401
+                return error_response('ID do funcionário não encontrado no token', 401)
             
             # Validate required fields
             required_fields = ['amount', 'term_months', 'purpose']
             for field in required_fields:
                 if field not in data:
-                    return jsonify({
-                        'status': 'error',
-                        'statusCode': 400,
-                        'message': f'O campo {field} é obrigatório'
-                    }), 400
+                    return error_response(f'O campo {field} é obrigatório', 400)
             
             # Create credit request
             result = CreditService.create_employee_credit_request(
@@ -108,32 +81,15 @@ class CreditController:
             )
             
             if isinstance(result, tuple):
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': result[1],
-                    'message': result[0]
-                }), result[1]
+                return error_response(result[0], result[1])
                 
-            return jsonify({
-                'status': 'success',
-                'statusCode': 201,
-                'message': 'Solicitação de crédito criada com sucesso',
-                'data': result
-            }), 201
+            return success_response('Solicitação de crédito criada com sucesso', data=result, status_code=201)
             
         except ValueError as e:
-            return jsonify({
-                'status': 'error',
-                'statusCode': 400,
-                'message': str(e)
-            }), 400
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao criar solicitação: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao criar solicitação de crédito: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao criar solicitação de crédito: {str(e)}', 500)
     
     @staticmethod
     def create_credit_request():
@@ -144,34 +100,21 @@ class CreditController:
             required_fields = ['amount', 'interest_rate', 'term_months', 'employee_id']
             for field in required_fields:
                 if field not in data:
-                    return jsonify({
-                        'status': 'error',
-                        'statusCode': 400,
-                        'message': f'Campo obrigatório não fornecido: {field}'
-                    }), 400
+                    return error_response(f'Campo obrigatório não fornecido: {field}', 400)
             
             credit_request, error = CreditService.create_credit_request(data)
             if error:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': error
-                }), 400
-            
-            return jsonify({
-                'status': 'success',
-                'statusCode': 201,
-                'message': 'Solicitação de crédito criada com sucesso',
-                'data': credit_request.to_dict()
-            }), 201
+                return error_response(error, 400)
+            
+            return success_response(
+                'Solicitação de crédito criada com sucesso',
+                data=credit_request.to_dict(),
+                status_code=201
+            )
             
         except Exception as e:
             logging.error(f"Erro ao criar solicitação: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao criar solicitação: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao criar solicitação: {str(e)}', 500)
     
     @staticmethod
     def update_credit_status(credit_id, status=None):
@@ -181,55 +124,33 @@ class CreditController:
             if status is None:
                 data = request.get_json()
                 if not data or 'status' not in data:
-                    return jsonify({
-                        'status': 'error',
-                        'statusCode': 400,
-                        'message': 'Status não fornecido'
-                    }), 400
+                    return error_response('Status não fornecido', 400)
                 status = data['status']
             
             # Valida o status
             valid_statuses = ['approved', 'rejected']
             if status not in valid_statuses:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': f'Status inválido. Deve ser um dos seguintes: {", ".join(valid_statuses)}'
-                }), 400
+                return error_response(
+                    f'Status inválido. Deve ser um dos seguintes: {", ".join(valid_statuses)}',
+                    400
+                )
             
             jwt = get_jwt()
             company_id = jwt.get('company_id')
             
             if not company_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID da empresa não encontrado no token'
-                }), 401
+                return error_response('ID da empresa não encontrado no token', 401)
             
             result, error = CreditService.update_credit_request_status(credit_id, status, company_id)
             
             if error:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': error
-                }), 400
+                return error_response(error, 400)
                 
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': f'Solicitação de crédito {status} com sucesso',
-                'data': result.to_dict()
-            }), 200
+            return success_response(f'Solicitação de crédito {status} com sucesso', data=result.to_dict())
             
         except Exception as e:
             logging.error(f"Erro ao atualizar status: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao atualizar status: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao atualizar status: {str(e)}', 500)
 
     @staticmethod
     def get_employee_credit_requests():
@@ -239,11 +160,13 @@ class CreditController:
             employee_id = jwt.get('employee_id')
             
             if not employee_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID do funcionário não encontrado no token'
-                }), 401
+                return error_response('ID do funcionário não encontrado no token', 401)
+            
+            # Responder 304 se nada mudou desde a versão que o cliente já tem
+            etag = listing_etag(CreditService.get_listing_version(employee_id=employee_id))
+            response = not_modified(etag)
+            if response:
+                return response
             
             # Buscar solicitações do funcionário
             requests = CreditService.get_credit_requests_by_employee(employee_id)
@@ -252,21 +175,14 @@ class CreditController:
             # Converter para dicionário
             requests_dict = [req.to_dict() for req in requests]
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Solicitações encontradas',
-                'data': requests_dict,
-                'total': len(requests)
-            }), 200
+            return with_etag(
+                success_response('Solicitações encontradas', data=requests_dict, total=len(requests)),
+                etag
+            )
             
         except Exception as e:
             logging.error(f"Erro ao buscar solicitações: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar solicitações: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar solicitações: {str(e)}', 500)
 
     @staticmethod
     def get_pending_credit_requests():
@@ -276,11 +192,16 @@ class CreditController:
             company_id = jwt.get('company_id')
             
             if not company_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID da empresa não encontrado no token'
-                }), 401
+                return error_response('ID da empresa não encontrado no token', 401)
+            
+            # Responder 304 se nada mudou desde a versão que o cliente já tem
+            etag = listing_etag(CreditService.get_listing_version(
+                company_id=company_id,
+                status=CreditRequestStatus.PENDING
+            ))
+            response = not_modified(etag)
+            if response:
+                return response
             
             # Buscar solicitações pendentes da empresa
             requests = CreditService.get_pending_credit_requests_by_company(company_id)
@@ -289,21 +210,15 @@ class CreditController:
             # Converter para dicionário
             requests_dict = [req.to_dict() for req in requests]
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Solicitações pendentes encontradas',
-                'data': requests_dict,
-                'total': len(requests)
-            }), 200
+            return with_etag(success_response(
+                'Solicitações pendentes encontradas',
+                data=requests_dict,
+                total=len(requests)
+            ), etag)
             
         except Exception as e:
             logging.error(f"Erro ao buscar solicitações: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar solicitações: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar solicitações: {str(e)}', 500)
 
     @staticmethod
     def get_company_credit_requests():
@@ -313,22 +228,23 @@ class CreditController:
             company_id = jwt.get('company_id')
             
             if not company_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID da empresa não encontrado no token'
-                }), 401
+                return error_response('ID da empresa não encontrado no token', 401)
             
             # Obter status do query parameter, se fornecido
             status = request.args.get('status')
             
             # Validar status se fornecido
             if status and status not in ['pending', 'approved', 'rejected']:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Status inválido. Deve ser um dos seguintes: pending, approved, rejected'
-                }), 400
+                return error_response(
+                    'Status inválido. Deve ser um dos seguintes: pending, approved, rejected',
+                    400
+                )
+            
+            # Responder 304 se nada mudou desde a versão que o cliente já tem
+            etag = listing_etag(CreditService.get_listing_version(company_id=company_id, status=status))
+            response = not_modified(etag)
+            if response:
+                return response
             
             # Buscar solicitações da empresa
             requests = CreditService.get_credit_requests_by_company_and_status(company_id, status)
@@ -337,46 +253,38 @@ class CreditController:
             # Converter para dicionário
             requests_dict = [req.to_dict() for req in requests]
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Solicitações encontradas',
-                'data': requests_dict,
-                'total': len(requests),
-                'status_filter': status
-            }), 200
+            return with_etag(success_response(
+                'Solicitações encontradas',
+                data=requests_dict,
+                total=len(requests),
+                status_filter=status
+            ), etag)
             
         except Exception as e:
             logging.error(f"Erro ao buscar solicitações: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar solicitações: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar solicitações: {str(e)}', 500)
 
     @staticmethod
     def get_available_credit_requests():
-        """Lista todas as solicitações de crédito aprovadas disponíveis para investimento"""
+        """Lista as solicitações de crédito aprovadas disponíveis para investimento, paginadas por cursor"""
         try:
             # Obtém o ID do funcionário do token JWT
             jwt = get_jwt()
             employee_id = jwt.get('employee_id')
+            limit, cursor = parse_page_args(request.args)
             
             # Busca as solicitações disponíveis, excluindo as do próprio funcionário
-            requests = CreditService.get_available_credit_requests(employee_id)
+            requests, next_cursor = CreditService.get_available_credit_requests(employee_id, limit, cursor)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Solicitações disponíveis para investimento encontradas',
-                'data': requests,
-                'total': len(requests)
-            }), 200
+            return success_response(
+                'Solicitações disponíveis para investimento encontradas',
+                data=requests,
+                total=len(requests),
+                next_cursor=next_cursor
+            )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar solicitações disponíveis: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar solicitações disponíveis: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar solicitações disponíveis: {str(e)}', 500)
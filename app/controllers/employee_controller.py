@@ -2,70 +2,53 @@ from flask import jsonify, request
 from app.services.employee_service import EmployeeService
 from app.services.invitation_service import InvitationService
 from app.models.invitation import InvitationStatus
+from app.utils.responses import success_response, error_response
+from app.utils.export import parse_export_format, stream_export
 import logging
 
 class EmployeeController:
     @staticmethod
     def get_all_employees():
         try:
+            export_format = parse_export_format(request.args)
+            if export_format:
+                return stream_export(EmployeeService.iter_employees(), export_format, 'employees')
+            
             employees = EmployeeService.get_all_employees()
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Funcionários encontrados',
-                'data': [employee.to_dict() for employee in employees],
-                'total': len(employees)
-            }), 200
+            return success_response(
+                'Funcionários encontrados',
+                data=[employee.to_dict() for employee in employees],
+                total=len(employees)
+            )
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar funcionários: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar funcionários: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar funcionários: {str(e)}', 500)
     
     @staticmethod
     def get_employees_by_company(company_id):
         try:
             employees = EmployeeService.get_employees_by_company(company_id)
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Funcionários da empresa encontrados',
-                'data': [employee.to_dict() for employee in employees],
-                'total': len(employees)
-            }), 200
+            return success_response(
+                'Funcionários da empresa encontrados',
+                data=[employee.to_dict() for employee in employees],
+                total=len(employees)
+            )
         except Exception as e:
             logging.error(f"Erro ao buscar funcionários da empresa: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar funcionários: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar funcionários: {str(e)}', 500)
     
     @staticmethod
     def get_employee_by_id(employee_id):
         try:
             employee = EmployeeService.get_employee_by_id(employee_id)
             if not employee:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 404,
-                    'message': 'Funcionário não encontrado'
-                }), 404
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Funcionário encontrado',
-                'data': employee.to_dict()
-            }), 200
+                return error_response('Funcionário não encontrado', 404)
+            return success_response('Funcionário encontrado', data=employee.to_dict())
         except Exception as e:
             logging.error(f"Erro ao buscar funcionário: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar funcionário: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar funcionário: {str(e)}', 500)
     
     @staticmethod
     def create_employee():
@@ -76,62 +59,37 @@ class EmployeeController:
             required_fields = ['name', 'email', 'cpf', 'salary', 'company_id', 'password', 'invitation_code']
             for field in required_fields:
                 if field not in data:
-                    return jsonify({
-                        'status': 'error',
-                        'statusCode': 400,
-                        'message': f'Campo obrigatório não fornecido: {field}'
-                    }), 400
+                    return error_response(f'Campo obrigatório não fornecido: {field}', 400)
             
             # Validate invitation code
             valid, invitation_or_error = InvitationService.validate_employee_invitation(data['invitation_code'])
             if not valid:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': invitation_or_error
-                }), 400
+                return error_response(invitation_or_error, 400)
             
             # Verify email matches invitation
             if invitation_or_error.email.lower().strip() != data['email'].lower().strip():
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'O email não corresponde ao convite'
-                }), 400
+                return error_response('O email não corresponde ao convite', 400)
             
             # Verify company matches invitation
             if invitation_or_error.company_id != data['company_id']:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'A empresa não corresponde ao convite'
-                }), 400
+                return error_response('A empresa não corresponde ao convite', 400)
             
             employee, error = EmployeeService.create_employee(data)
             if error:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': error
-                }), 400
+                return error_response(error, 400)
             
             # Mark invitation as used
             InvitationService.mark_employee_invitation_used(invitation_or_error)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 201,
-                'message': 'Funcionário criado com sucesso',
-                'data': employee.to_dict()
-            }), 201
+            return success_response(
+                'Funcionário criado com sucesso',
+                data=employee.to_dict(),
+                status_code=201
+            )
             
         except Exception as e:
             logging.error(f"Erro ao criar funcionário: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao criar funcionário: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao criar funcionário: {str(e)}', 500)
     
     @staticmethod
     def invite_employee():
@@ -142,11 +100,7 @@ class EmployeeController:
             required_fields = ['email', 'company_id']
             for field in required_fields:
                 if field not in data:
-                    return jsonify({
-                        'status': 'error',
-                        'statusCode': 400,
-                        'message': f'Campo obrigatório não fornecido: {field}'
-                    }), 400
+                    return error_response(f'Campo obrigatório não fornecido: {field}', 400)
             
             # Optional role field
             role = data.get('role', 'employee')
@@ -159,31 +113,22 @@ class EmployeeController:
             )
             
             if error:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': error
-                }), 400
+                return error_response(error, 400)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 201,
-                'message': 'Convite enviado com sucesso',
-                'data': {
+            return success_response(
+                'Convite enviado com sucesso',
+                data={
                     'email': invitation.email,
                     'company_id': invitation.company_id,
                     'role': invitation.role,
-                    'expires_at': invitation.expires_at.isoformat()
-                }
-            }), 201
+                    'expires_at': invitation.expires_at
+                },
+                status_code=201
+            )
             
         except Exception as e:
             logging.error(f"Erro ao enviar convite: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao enviar convite: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao enviar convite: {str(e)}', 500)
     
     @staticmethod
     def update_employee(employee_id):
@@ -192,26 +137,13 @@ class EmployeeController:
             employee, error = EmployeeService.update_employee(employee_id, data)
             
             if error:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': error
-                }), 400
+                return error_response(error, 400)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Funcionário atualizado com sucesso',
-                'data': employee.to_dict()
-            }), 200
+            return success_response('Funcionário atualizado com sucesso', data=employee.to_dict())
             
         except Exception as e:
             logging.error(f"Erro ao atualizar funcionário: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao atualizar funcionário: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao atualizar funcionário: {str(e)}', 500)
     
     @staticmethod
     def delete_employee(employee_id):
@@ -219,25 +151,13 @@ class EmployeeController:
             success, error = EmployeeService.delete_employee(employee_id)
             
             if not success:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 404,
-                    'message': error
-                }), 404
+                return error_response(error, 404)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Funcionário excluído com sucesso'
-            }), 200
+            return success_response('Funcionário excluído com sucesso')
             
         except Exception as e:
             logging.error(f"Erro ao excluir funcionário: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao excluir funcionário: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao excluir funcionário: {str(e)}', 500)
     
     @staticmethod
     def register_employee():
@@ -1,111 +1,141 @@
-from flask import jsonify, request
+from flask import request
 from app.services.investment_service import InvestmentService
 from app.models.credit_request import CreditRequestStatus
+from app.utils.pagination import parse_page_args
+from app.utils.fields import parse_field_selection, select_fields
+from app.utils.responses import success_response, error_response
+from app.utils.export import parse_export_format, stream_export
+from app.utils.conditional import listing_etag, not_modified, with_etag
 from flask_jwt_extended import get_jwt
 import logging
 
 class InvestmentController:
+    # Listagens devolvem linhas compactas; o detalhe e "os meus investimentos" trazem os totais
+    LISTING_INCLUDE = ()
+    DETAIL_INCLUDE = ('credit_request', 'payments_summary')
+    
+    @staticmethod
+    def _parse_selection(default_include):
+        """?fields=id,amount,... e ?include=credit_request,payments_summary,payments"""
+        return parse_field_selection(
+            request.args,
+            InvestmentService.FIELDS,
+            InvestmentService.INCLUDES,
+            default_include
+        )
+    
     @staticmethod
     def get_all_investments():
         try:
-            investments = InvestmentService.get_all_investments()
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Investimentos encontrados',
-                'data': [investment.to_dict() for investment in investments],
-                'total': len(investments)
-            }), 200
+            fields, include = InvestmentController._parse_selection(InvestmentController.LISTING_INCLUDE)
+            export_format = parse_export_format(request.args)
+            if export_format:
+                rows = (select_fields(investment, fields) for investment in InvestmentService.iter_investments(include))
+                return stream_export(rows, export_format, 'investments')
+            
+            limit, cursor = parse_page_args(request.args)
+            etag = listing_etag(InvestmentService.get_listing_version())
+            response = not_modified(etag)
+            if response:
+                return response
+            
+            investments, next_cursor = InvestmentService.list_investments(include=include, limit=limit, cursor=cursor)
+            return with_etag(success_response(
+                'Investimentos encontrados',
+                data=[select_fields(investment, fields) for investment in investments],
+                total=len(investments),
+                next_cursor=next_cursor
+            ), etag)
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar investimentos: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar investimentos: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar investimentos: {str(e)}', 500)
     
     @staticmethod
     def get_investments_by_employee(employee_id):
         try:
-            investments = InvestmentService.get_investments_by_employee(employee_id)
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Investimentos do funcionário encontrados',
-                'data': [investment.to_dict() for investment in investments],
-                'total': len(investments)
-            }), 200
+            fields, include = InvestmentController._parse_selection(InvestmentController.DETAIL_INCLUDE)
+            etag = listing_etag(InvestmentService.get_listing_version(employee_id=employee_id))
+            response = not_modified(etag)
+            if response:
+                return response
+            
+            investments, _ = InvestmentService.list_investments(employee_id=employee_id, include=include)
+            return with_etag(success_response(
+                'Investimentos do funcionário encontrados',
+                data=[select_fields(investment, fields) for investment in investments],
+                total=len(investments)
+            ), etag)
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar investimentos do funcionário: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar investimentos: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar investimentos: {str(e)}', 500)
+    
+    @staticmethod
+    def get_portfolio_summary(employee_id):
+        """Resumo da carteira de investimentos do funcionário"""
+        try:
+            summary = InvestmentService.get_portfolio_summary(employee_id)
+            return success_response('Resumo da carteira calculado', data=summary)
+        except Exception as e:
+            logging.error(f"Erro ao calcular resumo da carteira: {str(e)}")
+            return error_response(f'Erro ao calcular resumo da carteira: {str(e)}', 500)
     
     @staticmethod
     def get_investments_by_credit(credit_id):
         try:
-            investments = InvestmentService.get_investments_by_credit(credit_id)
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Investimentos da solicitação encontrados',
-                'data': [investment.to_dict() for investment in investments],
-                'total': len(investments)
-            }), 200
+            fields, include = InvestmentController._parse_selection(InvestmentController.LISTING_INCLUDE)
+            etag = listing_etag(InvestmentService.get_listing_version(credit_request_id=credit_id))
+            response = not_modified(etag)
+            if response:
+                return response
+            
+            investments, _ = InvestmentService.list_investments(credit_request_id=credit_id, include=include)
+            return with_etag(success_response(
+                'Investimentos da solicitação encontrados',
+                data=[select_fields(investment, fields) for investment in investments],
+                total=len(investments)
+            ), etag)
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar investimentos da solicitação: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar investimentos: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar investimentos: {str(e)}', 500)
     
     @staticmethod
     def get_investment_by_id(investment_id):
         try:
-            investment = InvestmentService.get_investment_by_id(investment_id)
-            if not investment:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 404,
-                    'message': 'Investimento não encontrado'
-                }), 404
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Investimento encontrado',
-                'data': investment.to_dict()
-            }), 200
+            fields, include = InvestmentController._parse_selection(InvestmentController.DETAIL_INCLUDE)
+            investments, _ = InvestmentService.list_investments(investment_id=investment_id, include=include)
+            if not investments:
+                return error_response('Investimento não encontrado', 404)
+            return success_response('Investimento encontrado', data=select_fields(investments[0], fields))
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar investimento: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar investimento: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar investimento: {str(e)}', 500)
     
     @staticmethod
     def list_investment_opportunities():
         try:
-            opportunities = InvestmentService.get_available_opportunities()
+            limit, cursor = parse_page_args(request.args)
+            opportunities, next_cursor = InvestmentService.get_available_opportunities(limit, cursor)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Oportunidades de investimento encontradas',
-                'data': opportunities,
-                'total': len(opportunities)
-            }), 200
+            return success_response(
+                'Oportunidades de investimento encontradas',
+                data=opportunities,
+                total=len(opportunities),
+                next_cursor=next_cursor
+            )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar oportunidades: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar oportunidades: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar oportunidades: {str(e)}', 500)
     
     @staticmethod
     def create_investment():
@@ -114,30 +144,18 @@ class InvestmentController:
             jwt = get_jwt()
             
             if not data:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Dados não fornecidos'
-                }), 400
+                return error_response('Dados não fornecidos', 400)
             
             # Validate required fields
             required_fields = ['credit_request_id', 'amount']
             for field in required_fields:
                 if field not in data:
-                    return jsonify({
-                        'status': 'error',
-                        'statusCode': 400,
-                        'message': f'O campo {field} é obrigatório'
-                    }), 400
+                    return error_response(f'O campo {field} é obrigatório', 400)
             
             # Get employee_id from JWT claims
             employee_id = jwt.get('employee_id')
             if not employee_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID do funcionário não encontrado no token'
-                }), 401
+                return error_response('ID do funcionário não encontrado no token', 401)
             
             # Create investment
             result = InvestmentService.create_investment(
@@ -147,29 +165,12 @@ class InvestmentController:
             )
             
             if isinstance(result, tuple):
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': result[1],
-                    'message': result[0]
-                }), result[1]
+                return error_response(result[0], result[1])
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 201,
-                'message': 'Investimento realizado com sucesso',
-                'data': result
-            }), 201
+            return success_response('Investimento realizado com sucesso', data=result, status_code=201)
             
         except ValueError as e:
-            return jsonify({
-                'status': 'error',
-                'statusCode': 400,
-                'message': str(e)
-            }), 400
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao realizar investimento: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao realizar investimento: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao realizar investimento: {str(e)}', 500)
@@ -1,8 +1,12 @@
-from flask import jsonify, request
+from flask import request
 from app.services.invitation_service import InvitationService
 from app.models.invitation import InvitationStatus
 from app.models.company import Company
+from app.utils.responses import success_response, error_response
+from app.utils.principal import current_principal
 from flask_jwt_extended import get_jwt
+import csv
+import io
 import logging
 
 class InvitationController:
@@ -13,11 +17,7 @@ class InvitationController:
             
             # Basic validation
             if 'email' not in data:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Campo obrigatório não fornecido: email'
-                }), 400
+                return error_response('Campo obrigatório não fornecido: email', 400)
             
             # Create invitation
             invitation, error = InvitationService.create_company_invitation(
@@ -25,29 +25,20 @@ class InvitationController:
             )
             
             if error:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': error
-                }), 400
-            
-            return jsonify({
-                'status': 'success',
-                'statusCode': 201,
-                'message': 'Convite para empresa criado com sucesso',
-                'data': {
+                return error_response(error, 400)
+            
+            return success_response(
+                'Convite para empresa criado com sucesso',
+                data={
                     'email': invitation.email,
-                    'expires_at': invitation.expires_at.isoformat()
-                }
-            }), 201
+                    'expires_at': invitation.expires_at
+                },
+                status_code=201
+            )
             
         except Exception as e:
             logging.error(f"Erro ao criar convite para empresa: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao criar convite: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao criar convite: {str(e)}', 500)
     
     @staticmethod
     def create_employee_invitation():
@@ -58,11 +49,7 @@ class InvitationController:
             required_fields = ['email', 'company_id']
             for field in required_fields:
                 if field not in data:
-                    return jsonify({
-                        'status': 'error',
-                        'statusCode': 400,
-                        'message': f'Campo obrigatório não fornecido: {field}'
-                    }), 400
+                    return error_response(f'Campo obrigatório não fornecido: {field}', 400)
             
             # Optional role field
             role = data.get('role', 'employee')
@@ -75,74 +62,159 @@ class InvitationController:
             )
             
             if error:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': error
-                }), 400
-            
-            return jsonify({
-                'status': 'success',
-                'statusCode': 201,
-                'message': 'Convite para funcionário criado com sucesso',
-                'data': {
+                return error_response(error, 400)
+            
+            return success_response(
+                'Convite para funcionário criado com sucesso',
+                data={
                     'email': invitation.email,
                     'company_id': invitation.company_id,
                     'role': invitation.role,
-                    'expires_at': invitation.expires_at.isoformat()
-                }
-            }), 201
+                    'expires_at': invitation.expires_at
+                },
+                status_code=201
+            )
             
         except Exception as e:
             logging.error(f"Erro ao criar convite para funcionário: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao criar convite: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao criar convite: {str(e)}', 500)
     
+    @staticmethod
+    def _parse_bulk_rows():
+        """Lê as linhas do convite em massa: ficheiro CSV (campo 'file'), corpo text/csv
+        ou JSON (lista de objetos/emails, ou {"invitations": [...]})."""
+        upload = request.files.get('file')
+        if upload is not None or request.mimetype == 'text/csv':
+            text = upload.read().decode('utf-8-sig') if upload is not None else request.get_data(as_text=True)
+            reader = csv.DictReader(io.StringIO(text))
+            fields = [f.strip().lower() for f in (reader.fieldnames or [])]
+            if 'email' not in fields:
+                raise ValueError("O CSV deve ter uma coluna 'email'")
+            reader.fieldnames = fields
+            return [{'email': row.get('email'), 'role': row.get('role')} for row in reader]
+
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('invitations')
+        if not isinstance(data, list):
+            raise ValueError("Envie um ficheiro CSV ou uma lista JSON de convites")
+        return [item if isinstance(item, dict) else {'email': item} for item in data]
+
+    @staticmethod
+    def create_employee_invitations_bulk():
+        """Cria convites para vários funcionários da empresa do gerente de uma só vez"""
+        try:
+            company_id = get_jwt().get('company_id')
+            if not company_id:
+                return error_response('ID da empresa não encontrado no token', 401)
+
+            try:
+                rows = InvitationController._parse_bulk_rows()
+            except (ValueError, UnicodeDecodeError) as e:
+                return error_response(str(e), 400)
+
+            if not rows:
+                return error_response('Nenhum convite fornecido', 400)
+
+            results, error = InvitationService.create_employee_invitations_bulk(
+                rows,
+                company_id=company_id,
+                created_by=current_principal().user_id
+            )
+
+            if error:
+                return error_response(error, 400)
+
+            summary = {}
+            for result in results:
+                summary[result['status']] = summary.get(result['status'], 0) + 1
+
+            return success_response(
+                f"{summary.get('created', 0)} convites criados",
+                data={
+                    'summary': summary,
+                    'results': results
+                },
+                status_code=201,
+                total=len(results)
+            )
+
+        except Exception as e:
+            logging.error(f"Erro ao criar convites em massa: {str(e)}")
+            return error_response(f'Erro ao criar convites: {str(e)}', 500)
+
+    @staticmethod
+    def validate_company_invitation(invitation_code):
+        """Valida um código de convite de empresa (apenas leitura)"""
+        try:
+            valid, invitation_or_error = InvitationService.validate_company_invitation(invitation_code)
+            
+            if not valid:
+                return error_response(invitation_or_error, 400)
+            
+            return success_response(
+                'Convite válido',
+                data={
+                    'email': invitation_or_error.email,
+                    'expires_at': invitation_or_error.expires_at
+                }
+            )
+            
+        except Exception as e:
+            logging.error(f"Erro ao validar convite de empresa: {str(e)}")
+            return error_response(f'Erro ao validar convite: {str(e)}', 500)
+
+    @staticmethod
+    def validate_employee_invitation(invitation_code):
+        """Valida um código de convite de funcionário (apenas leitura)"""
+        try:
+            valid, invitation_or_error = InvitationService.validate_employee_invitation(invitation_code)
+            
+            if not valid:
+                return error_response(invitation_or_error, 400)
+            
+            return success_response(
+                'Convite válido',
+                data={
+                    'email': invitation_or_error.email,
+                    'company_id': invitation_or_error.company_id,
+                    'role': invitation_or_error.role,
+                    'expires_at': invitation_or_error.expires_at
+                }
+            )
+            
+        except Exception as e:
+            logging.error(f"Erro ao validar convite de funcionário: {str(e)}")
+            return error_response(f'Erro ao validar convite: {str(e)}', 500)
+
     @staticmethod
     def validate_invitation():
         try:
             data = request.get_json()
             
             if not data or 'code' not in data:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Código do convite não fornecido'
-                }), 400
+                return error_response('Código do convite não fornecido', 400)
             
             # Validate invitation
             valid, invitation_or_error = InvitationService.validate_invitation(data['code'])
             
             if not valid:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': invitation_or_error
-                }), 400
-            
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Convite válido',
-                'data': {
+                return error_response(invitation_or_error, 400)
+            
+            return success_response(
+                'Convite válido',
+                data={
                     'email': invitation_or_error.email,
                     'company_id': invitation_or_error.company_id,
                     'company_name': invitation_or_error.company_name,
                     'role': invitation_or_error.role,
-                    'expires_at': invitation_or_error.expires_at.isoformat()
+                    'expires_at': invitation_or_error.expires_at
                 }
-            }), 200
+            )
             
         except Exception as e:
             logging.error(f"Erro ao validar convite: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao validar convite: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao validar convite: {str(e)}', 500)
 
     @staticmethod
     def get_company_invitations():
@@ -153,46 +225,31 @@ class InvitationController:
             role = jwt.get('role')
             
             if not company_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID da empresa não encontrado no token'
-                }), 401
+                return error_response('ID da empresa não encontrado no token', 401)
             
             # Verifica se o usuário tem a role de manager
             if role != 'manager':
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 403,
-                    'message': 'Acesso permitido apenas para gerentes'
-                }), 403
+                return error_response('Acesso permitido apenas para gerentes', 403)
             
             # Get status filter from query parameters
             status = request.args.get('status')
             
             # Validate status if provided
             if status and status not in ['pending', 'used', 'expired']:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Status inválido. Deve ser um dos seguintes: pending, used, expired'
-                }), 400
+                return error_response(
+                    'Status inválido. Deve ser um dos seguintes: pending, used, expired',
+                    400
+                )
             
             # Get invitations
             invitations = InvitationService.get_company_invitations(company_id, status)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Convites encontrados com sucesso',
-                'data': [invitation.to_dict() for invitation in invitations],
-                'total': len(invitations)
-            }), 200
+            return success_response(
+                'Convites encontrados com sucesso',
+                data=[invitation.to_dict() for invitation in invitations],
+                total=len(invitations)
+            )
             
         except Exception as e:
             logging.error(f"Erro ao buscar convites: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar convites: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar convites: {str(e)}', 500)
@@ -1,6 +1,7 @@
-from flask import jsonify, request
+from flask import request
 from app.models.user import User
 from app.models.company import Company
+from app.utils.responses import success_response, error_response
 from flask_jwt_extended import get_jwt
 import logging
 
@@ -14,35 +15,21 @@ class UserController:
             role = jwt.get('role')
             
             if not company_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID da empresa não encontrado no token'
-                }), 401
+                return error_response('ID da empresa não encontrado no token', 401)
             
             # Verifica se o usuário tem a role de manager
             if role != 'manager':
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 403,
-                    'message': 'Acesso permitido apenas para gerentes'
-                }), 403
+                return error_response('Acesso permitido apenas para gerentes', 403)
             
             # Busca todos os usuários da empresa
             users = User.query.filter_by(company_id=company_id).all()
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Usuários encontrados com sucesso',
-                'data': [user.to_dict() for user in users],
-                'total': len(users)
-            }), 200
+            return success_response(
+                'Usuários encontrados com sucesso',
+                data=[user.to_dict() for user in users],
+                total=len(users)
+            )
             
         except Exception as e:
             logging.error(f"Erro ao buscar usuários: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar usuários: {str(e)}'
-            }), 500 
\ No newline at end of file
+            return error_response(f'Erro ao buscar usuários: {str(e)}', 500) 
\ No newline at end of file
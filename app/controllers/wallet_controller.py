@@ -1,8 +1,11 @@
-from flask import jsonify, request
+from flask import request
 from app.services.wallet_service import WalletService
 from app.models.wallet_transaction import TransactionType
 from app.models.payment import PaymentStatus
+from app.utils.pagination import parse_page_args
+from app.utils.responses import success_response, error_response
 from flask_jwt_extended import get_jwt
+from datetime import datetime
 import logging
 
 class WalletController:
@@ -14,28 +17,15 @@ class WalletController:
             employee_id = jwt.get('employee_id')
             
             if not employee_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID do funcionário não encontrado no token'
-                }), 401
+                return error_response('ID do funcionário não encontrado no token', 401)
             
-            wallet = WalletService.get_wallet_by_employee(employee_id)
+            wallet = WalletService.get_wallet_view(employee_id)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Carteira encontrada',
-                'data': wallet.to_dict()
-            }), 200
+            return success_response('Carteira encontrada', data=wallet)
             
         except Exception as e:
             logging.error(f"Erro ao buscar carteira: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar carteira: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar carteira: {str(e)}', 500)
     
     @staticmethod
     def deposit():
@@ -46,52 +36,30 @@ class WalletController:
             employee_id = jwt.get('employee_id')
             
             if not employee_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID do funcionário não encontrado no token'
-                }), 401
+                return error_response('ID do funcionário não encontrado no token', 401)
             
             if not data or 'amount' not in data:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Valor do depósito não fornecido'
-                }), 400
+                return error_response('Valor do depósito não fornecido', 400)
             
             amount = float(data['amount'])
             if amount <= 0:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'O valor do depósito deve ser maior que zero'
-                }), 400
+                return error_response('O valor do depósito deve ser maior que zero', 400)
             
             wallet, transaction = WalletService.deposit(employee_id, amount)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Depósito realizado com sucesso',
-                'data': {
-                    'wallet': wallet.to_dict(),
+            return success_response(
+                'Depósito realizado com sucesso',
+                data={
+                    'wallet': wallet,
                     'transaction': transaction.to_dict()
                 }
-            }), 200
+            )
             
         except ValueError as e:
-            return jsonify({
-                'status': 'error',
-                'statusCode': 400,
-                'message': str(e)
-            }), 400
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao realizar depósito: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao realizar depósito: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao realizar depósito: {str(e)}', 500)
     
     @staticmethod
     def withdraw():
@@ -102,52 +70,30 @@ class WalletController:
             employee_id = jwt.get('employee_id')
             
             if not employee_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID do funcionário não encontrado no token'
-                }), 401
+                return error_response('ID do funcionário não encontrado no token', 401)
             
             if not data or 'amount' not in data:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Valor do saque não fornecido'
-                }), 400
+                return error_response('Valor do saque não fornecido', 400)
             
             amount = float(data['amount'])
             if amount <= 0:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'O valor do saque deve ser maior que zero'
-                }), 400
+                return error_response('O valor do saque deve ser maior que zero', 400)
             
             wallet, transaction = WalletService.withdraw(employee_id, amount)
             
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Saque realizado com sucesso',
-                'data': {
-                    'wallet': wallet.to_dict(),
+            return success_response(
+                'Saque realizado com sucesso',
+                data={
+                    'wallet': wallet,
                     'transaction': transaction.to_dict()
                 }
-            }), 200
+            )
             
         except ValueError as e:
-            return jsonify({
-                'status': 'error',
-                'statusCode': 400,
-                'message': str(e)
-            }), 400
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao realizar saque: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao realizar saque: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao realizar saque: {str(e)}', 500)
     
     @staticmethod
     def get_transactions():
@@ -157,38 +103,28 @@ class WalletController:
             employee_id = jwt.get('employee_id')
             
             if not employee_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID do funcionário não encontrado no token'
-                }), 401
-            
-            # Obtém o tipo de transação do query parameter, se fornecido
-            transaction_type = request.args.get('type')
-            if transaction_type and transaction_type not in [t.value for t in TransactionType]:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Tipo de transação inválido'
-                }), 400
-            
-            transactions = WalletService.get_transactions(employee_id, transaction_type)
-            
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Transações encontradas',
-                'data': [t.to_dict() for t in transactions],
-                'total': len(transactions)
-            }), 200
+                return error_response('ID do funcionário não encontrado no token', 401)
             
+            # Obtém os tipos de transação do query parameter (ex.: type=dividend,interest), se fornecidos
+            transaction_types = [t for t in request.args.get('type', '').split(',') if t]
+            if any(t not in TransactionType.ALL for t in transaction_types):
+                return error_response('Tipo de transação inválido', 400)
+            
+            limit, cursor = parse_page_args(request.args)
+            transactions, next_cursor = WalletService.get_transactions(employee_id, transaction_types, limit, cursor)
+            
+            return success_response(
+                'Transações encontradas',
+                data=[t.to_dict(include_employee=False) for t in transactions],
+                total=len(transactions),
+                next_cursor=next_cursor
+            )
+            
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar transações: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar transações: {str(e)}'
-            }), 500
+            return error_response(f'Erro ao buscar transações: {str(e)}', 500)
     
     @staticmethod
     def get_payments():
@@ -198,35 +134,56 @@ class WalletController:
             employee_id = jwt.get('employee_id')
             
             if not employee_id:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 401,
-                    'message': 'ID do funcionário não encontrado no token'
-                }), 401
+                return error_response('ID do funcionário não encontrado no token', 401)
             
             # Obtém o status do pagamento do query parameter, se fornecido
             status = request.args.get('status')
-            if status and status not in [s.value for s in PaymentStatus]:
-                return jsonify({
-                    'status': 'error',
-                    'statusCode': 400,
-                    'message': 'Status de pagamento inválido'
-                }), 400
-            
-            payments = WalletService.get_payments(employee_id, status)
-            
-            return jsonify({
-                'status': 'success',
-                'statusCode': 200,
-                'message': 'Pagamentos encontrados',
-                'data': [p.to_dict() for p in payments],
-                'total': len(payments)
-            }), 200
+            if status and status not in PaymentStatus.ALL:
+                return error_response('Status de pagamento inválido', 400)
+            
+            # upcoming_days=N: apenas pagamentos pendentes que vencem nos próximos N dias
+            upcoming_days = request.args.get('upcoming_days')
+            if upcoming_days is not None:
+                try:
+                    upcoming_days = int(upcoming_days)
+                except ValueError:
+                    upcoming_days = 0
+                if not 1 <= upcoming_days <= 366:
+                    return error_response('O parâmetro upcoming_days deve ser um número entre 1 e 366', 400)
+            
+            limit, cursor = parse_page_args(request.args)
+            payments, next_cursor = WalletService.get_payments(employee_id, status, upcoming_days, limit, cursor)
+            
+            return success_response(
+                'Pagamentos encontrados',
+                data=payments,
+                total=len(payments),
+                next_cursor=next_cursor
+            )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logging.error(f"Erro ao buscar pagamentos: {str(e)}")
-            return jsonify({
-                'status': 'error',
-                'statusCode': 500,
-                'message': f'Erro ao buscar pagamentos: {str(e)}'
-            }), 500 
\ No newline at end of file
+            return error_response(f'Erro ao buscar pagamentos: {str(e)}', 500)
+    
+    @staticmethod
+    def process_due_payments():
+        """Processa os pagamentos pendentes vencidos em lote"""
+        try:
+            data = request.get_json(silent=True) or {}
+            
+            as_of = datetime.fromisoformat(data['as_of']) if data.get('as_of') else None
+            batch_size = int(data['batch_size']) if data.get('batch_size') else None
+            if batch_size is not None and batch_size < 1:
+                raise ValueError('O tamanho do lote deve ser maior que zero')
+            
+            summary = WalletService.process_due_payments(as_of, batch_size)
+            
+            return success_response('Pagamentos vencidos processados', data=summary)
+            
+        except ValueError as e:
+            return error_response(str(e), 400)
+        except Exception as e:
+            logging.error(f"Erro ao processar pagamentos vencidos: {str(e)}")
+            return error_response(f'Erro ao processar pagamentos vencidos: {str(e)}', 500)
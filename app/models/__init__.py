@@ -7,3 +7,4 @@ from app.models.invitation import CompanyInvitation, EmployeeInvitation
 from app.models.wallet import Wallet
 from app.models.wallet_transaction import WalletTransaction
 from app.models.payment import Payment, PaymentStatus, PaymentType
+from app.models.email_outbox import EmailOutbox, EmailStatus
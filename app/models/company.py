@@ -26,7 +26,7 @@ class Company(db.Model):
             'address': self.address,
             'phone': self.phone,
             'email': self.email,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
             'manager_id': self.manager_id
         }
@@ -1,4 +1,7 @@
 from app import db
+from app.models.types import Money, format_money
+from app.models.employee import Employee
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import logging
 
@@ -14,15 +17,24 @@ class CreditRequest(db.Model):
     __tablename__ = 'credit_requests'
     
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     interest_rate = db.Column(db.Float, nullable=False)
     term_months = db.Column(db.Integer, nullable=False)
     purpose = db.Column(db.String(200))
     status = db.Column(db.String(20), default=CreditRequestStatus.PENDING)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    # Totais mantidos por InvestmentService.create_investment (ver CreditService.reconcile_funding)
+    funded_amount = db.Column(Money, nullable=False, default=0, server_default='0')
+    investor_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Solicitações de um funcionário (por estado) e feed de oportunidades (estado + data)
+        db.Index('ix_credit_requests_employee_id_status', 'employee_id', 'status'),
+        db.Index('ix_credit_requests_status_created_at', 'status', 'created_at'),
+    )
+    
     # Relationships
     employee = db.relationship('Employee', backref=db.backref('credit_requests', lazy=True, cascade="all, delete-orphan"))
     investments = db.relationship('Investment', backref='credit_request', lazy=True)
@@ -34,12 +46,21 @@ class CreditRequest(db.Model):
         self.purpose = purpose
         self.interest_rate = interest_rate
         self.status = status
+        self.funded_amount = 0
+        self.investor_count = 0
+    
+    @classmethod
+    def listing_options(cls):
+        """Opções de carregamento para listagens: funcionário e empresa na mesma query"""
+        return (
+            joinedload(cls.employee).joinedload(Employee.company),
+        )
     
     def to_dict(self):
         try:
             return {
                 'id': self.id,
-                'amount': self.amount,
+                'amount': format_money(self.amount),
                 'interest_rate': self.interest_rate,
                 'term_months': self.term_months,
                 'purpose': self.purpose,
@@ -47,9 +68,10 @@ class CreditRequest(db.Model):
                 'employee_id': self.employee_id,
                 'employee_name': self.employee.name if self.employee else None,
                 'company_name': self.employee.company.name if self.employee and self.employee.company else None,
-                'created_at': self.created_at.isoformat() if self.created_at else None,
-                'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-                'funded_amount': sum(investment.amount for investment in self.investments)
+                'created_at': self.created_at,
+                'updated_at': self.updated_at,
+                'funded_amount': format_money(self.funded_amount),
+                'investor_count': self.investor_count
             }
         except Exception as e:
             logging.error(f"Erro ao converter solicitação para dicionário: {str(e)}")
@@ -1,4 +1,5 @@
 from app import db
+from app.models.types import Money, format_money
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -11,12 +12,16 @@ class Employee(db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     cpf = db.Column(db.String(11), unique=True, nullable=False)
     position = db.Column(db.String(50))
-    salary = db.Column(db.Float, nullable=False)
+    salary = db.Column(Money, nullable=False)
     phone = db.Column(db.String(20))
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_employees_company_id', 'company_id'),
+    )
+    
     # Relationships
     investments = db.relationship('Investment', backref='employee', lazy=True, cascade="all, delete-orphan")
     
@@ -38,9 +43,9 @@ class Employee(db.Model):
             'email': self.email,
             'cpf': self.cpf,
             'position': self.position,
-            'salary': self.salary,
+            'salary': format_money(self.salary),
             'phone': self.phone,
             'company_id': self.company_id,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
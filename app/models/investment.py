@@ -1,4 +1,5 @@
 from app import db
+from app.models.types import Money, format_money
 from datetime import datetime
 import logging
 
@@ -6,72 +7,59 @@ class Investment(db.Model):
     __tablename__ = 'investments'
     
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
     credit_request_id = db.Column(db.Integer, db.ForeignKey('credit_requests.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
+    __table_args__ = (
+        # Investimentos de uma solicitação (e se um funcionário já investiu nela) e carteira do investidor
+        db.Index('ix_investments_credit_request_id_employee_id', 'credit_request_id', 'employee_id'),
+        db.Index('ix_investments_employee_id', 'employee_id'),
+    )
+    
+    def to_dict(self, include=('credit_request', 'payments_summary', 'payments')):
+        """include escolhe as partes caras: solicitação, resumo e lista de pagamentos.
+        Para listagens, InvestmentService.list_investments calcula o mesmo em SQL."""
         try:
-            # Calcula o total de pagamentos recebidos
-            total_paid = sum(
-                payment.amount 
-                for payment in self.payments 
-                if payment.status == 'paid'
-            )
-            
-            # Calcula o total de pagamentos pendentes
-            total_pending = sum(
-                payment.amount 
-                for payment in self.payments 
-                if payment.status == 'pending'
-            )
-            
-            # Calcula o total de juros a receber
-            total_interest = sum(
-                payment.amount 
-                for payment in self.payments 
-                if payment.type == 'interest' and payment.status == 'pending'
-            )
-            
-            # Calcula o total de dividendos a receber
-            total_dividend = sum(
-                payment.amount 
-                for payment in self.payments 
-                if payment.type == 'dividend' and payment.status == 'pending'
-            )
-            
-            return {
+            data = {
                 'id': self.id,
-                'amount': self.amount,
+                'amount': format_money(self.amount),
                 'employee_id': self.employee_id,
                 'credit_request_id': self.credit_request_id,
-                'created_at': self.created_at.isoformat(),
-                'credit_request': {
+                'created_at': self.created_at
+            }
+            
+            if 'credit_request' in include:
+                data['credit_request'] = {
                     'id': self.credit_request.id,
-                    'amount': self.credit_request.amount,
+                    'amount': format_money(self.credit_request.amount),
                     'interest_rate': self.credit_request.interest_rate,
                     'term_months': self.credit_request.term_months,
                     'purpose': self.credit_request.purpose,
                     'status': self.credit_request.status,
                     'employee_name': self.credit_request.employee.name,
                     'company_name': self.credit_request.employee.company.name,
-                    'created_at': self.credit_request.created_at.isoformat(),
-                    'funded_amount': sum(inv.amount for inv in self.credit_request.investments),
-                    'investment_percentage': (sum(inv.amount for inv in self.credit_request.investments) / self.credit_request.amount) * 100
-                },
-                'payments_summary': {
-                    'total_paid': total_paid,
-                    'total_pending': total_pending,
-                    'total_interest': total_interest,
-                    'total_dividend': total_dividend,
-                    'next_payment': min(
-                        (p for p in self.payments if p.status == 'pending'),
-                        key=lambda p: p.due_date
-                    ).to_dict() if any(p.status == 'pending' for p in self.payments) else None
-                },
-                'payments': [payment.to_dict() for payment in self.payments]
-            }
+                    'created_at': self.credit_request.created_at,
+                    'funded_amount': format_money(self.credit_request.funded_amount),
+                    'investment_percentage': float(self.credit_request.funded_amount / self.credit_request.amount * 100)
+                }
+            
+            if 'payments_summary' in include:
+                pending = [p for p in self.payments if p.status == 'pending']
+                next_payment = min(pending, key=lambda p: p.due_date) if pending else None
+                data['payments_summary'] = {
+                    'total_paid': format_money(sum(p.amount for p in self.payments if p.status == 'paid')),
+                    'total_pending': format_money(sum(p.amount for p in pending)),
+                    'total_interest': format_money(sum(p.amount for p in pending if p.type == 'interest')),
+                    'total_dividend': format_money(sum(p.amount for p in pending if p.type == 'dividend')),
+                    'next_payment_date': next_payment.due_date if next_payment else None
+                }
+            
+            if 'payments' in include:
+                data['payments'] = [payment.to_dict() for payment in self.payments]
+            
+            return data
         except Exception as e:
             logging.error(f"Erro ao converter investimento para dicionário: {str(e)}")
             raise
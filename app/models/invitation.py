@@ -7,6 +7,14 @@ class InvitationStatus:
     USED = 'used'
     EXPIRED = 'expired'
 
+def effective_status(invitation, now=None):
+    """Estado do convite calculado na leitura: um convite pendente cujo prazo
+    passou é tratado como expirado, mesmo que o sweeper ainda não o tenha gravado."""
+    if invitation.status == InvitationStatus.PENDING and not invitation.is_used:
+        if invitation.expires_at <= (now or datetime.utcnow()):
+            return InvitationStatus.EXPIRED
+    return invitation.status
+
 class CompanyInvitation(db.Model):
     __tablename__ = 'company_invitations'
     
@@ -26,9 +34,9 @@ class CompanyInvitation(db.Model):
             'email': self.email,
             'invitation_code': self.invitation_code,
             'is_used': self.is_used,
-            'status': self.status,
-            'created_at': self.created_at.isoformat(),
-            'expires_at': self.expires_at.isoformat(),
+            'status': effective_status(self),
+            'created_at': self.created_at,
+            'expires_at': self.expires_at,
             'company_id': self.company_id,
             'created_by': self.created_by
         }
@@ -48,6 +56,12 @@ class EmployeeInvitation(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     
+    __table_args__ = (
+        # Convites da empresa (listagem) e verificação de convites pendentes por email
+        db.Index('ix_employee_invitations_company_id_created_at', 'company_id', 'created_at'),
+        db.Index('ix_employee_invitations_company_id_email', 'company_id', 'email'),
+    )
+    
     # Relationship
     company = db.relationship('Company', backref='sent_invitations')
     
@@ -58,10 +72,10 @@ class EmployeeInvitation(db.Model):
             'invitation_code': self.invitation_code,
             'company_id': self.company_id,
             'is_used': self.is_used,
-            'status': self.status,
+            'status': effective_status(self),
             'role': self.role,
-            'created_at': self.created_at.isoformat(),
-            'expires_at': self.expires_at.isoformat(),
+            'created_at': self.created_at,
+            'expires_at': self.expires_at,
             'created_by': self.created_by,
             'user_id': self.user_id
         }
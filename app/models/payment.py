@@ -1,4 +1,5 @@
 from app import db
+from app.models.types import Money, format_money
 from datetime import datetime
 import logging
 
@@ -10,6 +11,8 @@ class PaymentStatus:
     PENDING = 'pending'  # Pagamento pendente
     PAID = 'paid'  # Pagamento realizado
     FAILED = 'failed'  # Falha no pagamento
+    
+    ALL = (PENDING, PAID, FAILED)
 
 class Payment(db.Model):
     __tablename__ = 'payments'
@@ -17,13 +20,19 @@ class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     investment_id = db.Column(db.Integer, db.ForeignKey('investments.id'), nullable=False)
     type = db.Column(db.String(20), nullable=False)  # dividend ou interest
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     status = db.Column(db.String(20), default=PaymentStatus.PENDING)
     due_date = db.Column(db.DateTime, nullable=False)
     paid_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Pagamentos de um investimento e pagamentos pendentes vencidos
+        db.Index('ix_payments_investment_id_status_due_date', 'investment_id', 'status', 'due_date'),
+        db.Index('ix_payments_status_due_date', 'status', 'due_date'),
+    )
+    
     # Relationships
     investment = db.relationship('Investment', backref=db.backref('payments', lazy=True))
     
@@ -39,12 +48,12 @@ class Payment(db.Model):
                 'id': self.id,
                 'investment_id': self.investment_id,
                 'type': self.type,
-                'amount': self.amount,
+                'amount': format_money(self.amount),
                 'status': self.status,
-                'due_date': self.due_date.isoformat() if self.due_date else None,
-                'paid_at': self.paid_at.isoformat() if self.paid_at else None,
-                'created_at': self.created_at.isoformat() if self.created_at else None,
-                'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+                'due_date': self.due_date,
+                'paid_at': self.paid_at,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at,
                 'employee_name': self.investment.employee.name if self.investment and self.investment.employee else None,
                 'credit_request_id': self.investment.credit_request_id if self.investment else None
             }
@@ -0,0 +1,36 @@
+from app import db
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+def to_money(value):
+    """Converte um valor (int, float, str ou Decimal) em Decimal com duas casas decimais"""
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        # str() evita herdar o erro binário do float (ex.: 0.1 -> 0.1000000000000000055...)
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+def format_money(value):
+    """Formata um valor monetário para a resposta JSON"""
+    return float(value) if value is not None else None
+
+class Money(db.TypeDecorator):
+    """Valor em kwanzas guardado como BIGINT em cêntimos
+    
+    Do lado Python os valores são Decimal com duas casas decimais, pelo que somas e
+    comparações feitas em SQL (SUM, funded_amount + x <= amount) são exatas.
+    """
+    impl = db.BigInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(to_money(value) * 100)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Decimal(int(value)).scaleb(-2)
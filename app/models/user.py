@@ -44,8 +44,8 @@ class User(db.Model):
             'company_id': self.company_id,
             'is_admin': self.is_admin,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
     def is_employee(self):
@@ -82,4 +82,19 @@ class User(db.Model):
                 return jsonify({'message': 'Acesso permitido apenas para gerentes'}), 403
                 
             return f(*args, **kwargs)
-        return decorated_function
\ No newline at end of file
+        return decorated_function
+
+    @staticmethod
+    def admin_required(f):
+        """Decorator to require an admin user"""
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            from app.utils.principal import current_principal
+            verify_jwt_in_request()
+            user = current_principal().user
+            
+            if not user or not user.is_admin:
+                return jsonify({'message': 'Acesso não autorizado'}), 403
+                
+            return f(*args, **kwargs)
+        return decorated_function
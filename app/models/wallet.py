@@ -1,4 +1,5 @@
 from app import db
+from app.models.types import Money, format_money, to_money
 from datetime import datetime
 import logging
 
@@ -7,15 +8,20 @@ class Wallet(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
-    balance = db.Column(db.Float, default=0.0)
+    balance = db.Column(Money, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Uma carteira por funcionário
+        db.Index('ix_wallets_employee_id', 'employee_id', unique=True),
+    )
+    
     # Relationships
     employee = db.relationship('Employee', backref=db.backref('wallet', uselist=False))
     transactions = db.relationship('WalletTransaction', backref='wallet', lazy=True)
     
-    def __init__(self, employee_id, balance=0.0):
+    def __init__(self, employee_id, balance=0):
         self.employee_id = employee_id
         self.balance = balance
     
@@ -24,9 +30,9 @@ class Wallet(db.Model):
             return {
                 'id': self.id,
                 'employee_id': self.employee_id,
-                'balance': self.balance,
-                'created_at': self.created_at.isoformat() if self.created_at else None,
-                'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+                'balance': format_money(self.balance),
+                'created_at': self.created_at,
+                'updated_at': self.updated_at,
                 'employee_name': self.employee.name if self.employee else None
             }
         except Exception as e:
@@ -35,6 +41,7 @@ class Wallet(db.Model):
     
     def add_balance(self, amount):
         """Adiciona saldo à carteira"""
+        amount = to_money(amount)
         if amount <= 0:
             raise ValueError("O valor deve ser maior que zero")
         self.balance += amount
@@ -42,6 +49,7 @@ class Wallet(db.Model):
     
     def subtract_balance(self, amount):
         """Subtrai saldo da carteira"""
+        amount = to_money(amount)
         if amount <= 0:
             raise ValueError("O valor deve ser maior que zero")
         if amount > self.balance:
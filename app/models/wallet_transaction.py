@@ -1,4 +1,5 @@
 from app import db
+from app.models.types import Money, format_money
 from datetime import datetime
 import logging
 
@@ -8,6 +9,8 @@ class TransactionType:
     DIVIDEND = 'dividend'  # Recebimento de dividendos
     INTEREST = 'interest'  # Recebimento de juros
     WITHDRAWAL = 'withdrawal'  # Saque de saldo
+    
+    ALL = (DEPOSIT, INVESTMENT, DIVIDEND, INTEREST, WITHDRAWAL)
 
 class WalletTransaction(db.Model):
     __tablename__ = 'wallet_transactions'
@@ -15,11 +18,17 @@ class WalletTransaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     wallet_id = db.Column(db.Integer, db.ForeignKey('wallets.id'), nullable=False)
     type = db.Column(db.String(20), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     description = db.Column(db.String(200))
     investment_id = db.Column(db.Integer, db.ForeignKey('investments.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Extrato da carteira, do mais recente para o mais antigo (com ou sem filtro por tipo)
+        db.Index('ix_wallet_transactions_wallet_id_created_at', 'wallet_id', 'created_at'),
+        db.Index('ix_wallet_transactions_wallet_id_type_created_at', 'wallet_id', 'type', 'created_at'),
+    )
+    
     # Relationships
     investment = db.relationship('Investment', backref=db.backref('wallet_transactions', lazy=True))
     
@@ -30,18 +39,21 @@ class WalletTransaction(db.Model):
         self.description = description
         self.investment_id = investment_id
     
-    def to_dict(self):
+    def to_dict(self, include_employee=True):
+        """include_employee=False evita carregar carteira e funcionário por transação (listagens)"""
         try:
-            return {
+            data = {
                 'id': self.id,
                 'wallet_id': self.wallet_id,
                 'type': self.type,
-                'amount': self.amount,
+                'amount': format_money(self.amount),
                 'description': self.description,
                 'investment_id': self.investment_id,
-                'created_at': self.created_at.isoformat() if self.created_at else None,
-                'employee_name': self.wallet.employee.name if self.wallet and self.wallet.employee else None
+                'created_at': self.created_at
             }
+            if include_employee:
+                data['employee_name'] = self.wallet.employee.name if self.wallet and self.wallet.employee else None
+            return data
         except Exception as e:
             logging.error(f"Erro ao converter transação para dicionário: {str(e)}")
             raise 
\ No newline at end of file
@@ -2,10 +2,18 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.models.user import User
 from app.models.invitation import CompanyInvitation
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
 import uuid
 from app.services.invitation_service import InvitationService
+from app.services.email_service import EmailService
+from app.utils.cache import get_cache_metrics as cache_metrics
+from app.utils.principal import current_principal
+from app.controllers.wallet_controller import WalletController
+from app.controllers.credit_controller import CreditController
+from app.controllers.investment_controller import InvestmentController
+from app.controllers.employee_controller import EmployeeController
+from app.controllers.company_controller import CompanyController
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -48,8 +56,7 @@ def admin_signup():
 @admin_bp.route('/invite/company', methods=['POST'])
 @jwt_required()
 def invite_company():
-    current_user = get_jwt_identity()
-    user = User.query.get(current_user['user_id'])
+    user = current_principal().user
     
     if not user or not user.is_admin:
         return jsonify({'message': 'Acesso não autorizado'}), 403
@@ -70,4 +77,54 @@ def invite_company():
     return jsonify({
         'message': 'Convite enviado com sucesso',
         'invitation': invitation.to_dict()
-    }), 201
\ No newline at end of file
+    }), 201
+
+@admin_bp.route('/admin/payments/process-due', methods=['POST'])
+@jwt_required()
+@User.admin_required
+def process_due_payments():
+    """Liquida os pagamentos pendentes vencidos"""
+    return WalletController.process_due_payments()
+
+@admin_bp.route('/admin/email/metrics', methods=['GET'])
+@jwt_required()
+@User.admin_required
+def get_email_metrics():
+    """Estado da outbox de emails e tempos de renderização dos templates"""
+    return jsonify(EmailService.get_metrics()), 200
+
+@admin_bp.route('/admin/cache/metrics', methods=['GET'])
+@jwt_required()
+@User.admin_required
+def get_cache_metrics():
+    """Acertos, falhas e invalidações de cada cache deste processo"""
+    return jsonify(cache_metrics()), 200
+
+# Listagens administrativas; ?format=ndjson|csv transmite a exportação completa em streaming
+@admin_bp.route('/admin/credits', methods=['GET'])
+@jwt_required()
+@User.admin_required
+def list_credit_requests():
+    """Lista todas as solicitações de crédito"""
+    return CreditController.get_all_credit_requests()
+
+@admin_bp.route('/admin/investments', methods=['GET'])
+@jwt_required()
+@User.admin_required
+def list_investments():
+    """Lista todos os investimentos"""
+    return InvestmentController.get_all_investments()
+
+@admin_bp.route('/admin/employees', methods=['GET'])
+@jwt_required()
+@User.admin_required
+def list_employees():
+    """Lista todos os funcionários"""
+    return EmployeeController.get_all_employees()
+
+@admin_bp.route('/admin/companies', methods=['GET'])
+@jwt_required()
+@User.admin_required
+def list_companies():
+    """Lista todas as empresas"""
+    return CompanyController.get_all_companies()
@@ -3,14 +3,16 @@ from app import db
 from app.models.user import User
 from app.models.invitation import CompanyInvitation, EmployeeInvitation
 from app.models.company import Company
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 from datetime import timedelta
 import datetime
 from sqlalchemy.exc import IntegrityError
 from app.services.invitation_service import InvitationService
+from app.services.employee_service import EmployeeService
 from app.models.employee import Employee
 from app.models.invitation import InvitationStatus
 from app.controllers.auth_controller import AuthController
+from app.utils.principal import current_principal
 import logging
 
 auth_bp = Blueprint('auth', __name__)
@@ -113,9 +115,9 @@ def manager_login():
 @User.manager_required
 def verify_manager():
     try:
-        current_user = get_jwt_identity()
-        user = User.query.get(current_user['user_id'])
-        company = Company.query.get(user.company_id)
+        principal = current_principal()
+        user = principal.user
+        company = principal.company
         
         if not company:
             return jsonify({
@@ -129,8 +131,8 @@ def verify_manager():
             'statusCode': 200,
             'message': 'Token válido',
             'data': {
-                'user': user.to_dict(),
-                'company': company.to_dict()
+                'user': user.row().to_dict(),
+                'company': company.row().to_dict()
             }
         }), 200
         
@@ -320,6 +322,7 @@ def employee_signup():
         )
         employee.password = data['password']
         db.session.add(employee)
+        EmployeeService._provision_wallet(employee)
         
         # Update invitation status
         invitation_or_error.is_used = True
@@ -31,6 +31,16 @@ def get_my_investments():
     employee_id = jwt.get('employee_id')
     return InvestmentController.get_investments_by_employee(employee_id)
 
+# Resumo da carteira de investimentos do funcionário
+@investment_bp.route('/portfolio/summary', methods=['GET'])
+@jwt_required()
+@User.employee_required
+def get_portfolio_summary():
+    """Totais investidos, recebidos e a receber do funcionário logado"""
+    jwt = get_jwt()
+    employee_id = jwt.get('employee_id')
+    return InvestmentController.get_portfolio_summary(employee_id)
+
 # Buscar investimento por ID
 @investment_bp.route('/<int:investment_id>', methods=['GET'])
 @jwt_required()
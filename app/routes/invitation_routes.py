@@ -15,6 +15,12 @@ def create_company_invitation():
 def create_employee_invitation():
     return InvitationController.create_employee_invitation()
 
+@invitation_bp.route('/employee/bulk', methods=['POST'])
+@jwt_required()
+@User.manager_required
+def create_employee_invitations_bulk():
+    return InvitationController.create_employee_invitations_bulk()
+
 # Invitation validation endpoint
 @invitation_bp.route('/validate/company/<invitation_code>', methods=['GET'])
 def validate_company_invitation(invitation_code):
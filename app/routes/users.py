@@ -2,10 +2,11 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.models.user import User
 from app.models.invitation import EmployeeInvitation
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
 import uuid
 from app.controllers.user_controller import UserController
+from app.utils.principal import current_principal
 
 users_bp = Blueprint('users', __name__)
 
@@ -13,8 +14,8 @@ users_bp = Blueprint('users', __name__)
 @users_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_users():
-    current_user = get_jwt_identity()
-    user = User.query.get(current_user['user_id'])
+    principal = current_principal()
+    user = principal.user
     
     if not user:
         return jsonify({'message': 'Usuário não encontrado'}), 404
@@ -36,8 +37,8 @@ def get_users():
 @users_bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
 def get_user(user_id):
-    current_user = get_jwt_identity()
-    user = User.query.get(current_user['user_id'])
+    principal = current_principal()
+    user = principal.user
     
     if not user:
         return jsonify({'message': 'Usuário não encontrado'}), 404
@@ -47,7 +48,7 @@ def get_user(user_id):
         return jsonify({'message': 'Usuário alvo não encontrado'}), 404
     
     # Check permissions
-    if user.is_admin or current_user['user_id'] == user_id or (
+    if user.is_admin or principal.user_id == user_id or (
         user.role == 'manager' and 
         target_user.company_id == user.company_id
     ):
@@ -59,8 +60,8 @@ def get_user(user_id):
 @users_bp.route('/<int:user_id>', methods=['PUT'])
 @jwt_required()
 def update_user(user_id):
-    current_user = get_jwt_identity()
-    user = User.query.get(current_user['user_id'])
+    principal = current_principal()
+    user = principal.user
     
     if not user:
         return jsonify({'message': 'Usuário não encontrado'}), 404
@@ -70,7 +71,7 @@ def update_user(user_id):
         return jsonify({'message': 'Usuário alvo não encontrado'}), 404
     
     # Check permissions
-    if not (user.is_admin or current_user['user_id'] == user_id or (
+    if not (user.is_admin or principal.user_id == user_id or (
         user.role == 'manager' and 
         target_user.company_id == user.company_id
     )):
@@ -83,7 +84,7 @@ def update_user(user_id):
         target_user.name = data['name']
     
     # Only admin or self can update email
-    if 'email' in data and (user.is_admin or current_user['user_id'] == user_id):
+    if 'email' in data and (user.is_admin or principal.user_id == user_id):
         target_user.email = data['email']
     
     # Only admin or manager can update role
@@ -122,8 +123,8 @@ def update_user(user_id):
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
 @jwt_required()
 def delete_user(user_id):
-    current_user = get_jwt_identity()
-    user = User.query.get(current_user['user_id'])
+    principal = current_principal()
+    user = principal.user
     
     if not user:
         return jsonify({'message': 'Usuário não encontrado'}), 404
@@ -152,8 +153,8 @@ def delete_user(user_id):
 @users_bp.route('/invite', methods=['POST'])
 @jwt_required()
 def invite_employee():
-    current_user = get_jwt_identity()
-    user = User.query.get(current_user['user_id'])
+    principal = current_principal()
+    user = principal.user
     
     if not user or user.role not in ['manager', 'admin']:
         return jsonify({'message': 'Acesso não autorizado'}), 403
@@ -165,9 +166,14 @@ def invite_employee():
     if data['role'] not in ['employee', 'manager']:
         return jsonify({'message': 'Função deve ser "employee" ou "manager"'}), 400
     
+    if not isinstance(data['email'], str):
+        return jsonify({'message': 'Email inválido'}), 400
+    # Os emails dos convites são gravados em minúsculas
+    email = data['email'].strip().lower()
+    
     # Check if invitation already exists
     existing_invitation = EmployeeInvitation.query.filter_by(
-        email=data['email'],
+        email=email,
         company_id=user.company_id,
         is_used=False
     ).first()
@@ -180,7 +186,7 @@ def invite_employee():
     invitation_code = str(uuid.uuid4())
     
     invitation = EmployeeInvitation(
-        email=data['email'],
+        email=email,
         role=data['role'],
         company_id=user.company_id,
         invitation_code=invitation_code,
@@ -2,6 +2,7 @@ from app import db
 from app.models.company import Company
 from app.models.user import User
 from app.services.invitation_service import InvitationService
+from app.utils.export import EXPORT_BATCH_SIZE
 from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash
 
@@ -10,6 +11,13 @@ class CompanyService:
     def get_all_companies():
         return Company.query.all()
     
+    @staticmethod
+    def iter_companies(batch_size=EXPORT_BATCH_SIZE):
+        """Percorre todas as empresas em lotes (yield_per) para exportação"""
+        query = Company.query.order_by(Company.id).yield_per(batch_size)
+        for company in query:
+            yield company.to_dict()
+    
     @staticmethod
     def get_company_by_id(company_id):
         return Company.query.get(company_id)
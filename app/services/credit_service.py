@@ -1,6 +1,14 @@
 from app import db
 from app.models.credit_request import CreditRequest, CreditRequestStatus
 from app.models.employee import Employee
+from app.models.company import Company
+from app.models.investment import Investment
+from app.models.types import format_money
+from app.utils.pagination import keyset_page, DEFAULT_PAGE_SIZE
+from app.utils.export import EXPORT_BATCH_SIZE
+from app.utils.cache import get_cache
+from flask import current_app
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import logging
@@ -18,18 +26,33 @@ class CreditService:
     def get_all_credit_requests():
         """Retorna todas as solicitações de crédito"""
         try:
-            requests = CreditRequest.query.all()
+            requests = CreditRequest.query.options(*CreditRequest.listing_options()).all()
             logging.info(f"Buscando todas as solicitações de crédito. Total encontrado: {len(requests)}")
             return requests
         except Exception as e:
             logging.error(f"Erro ao buscar solicitações: {str(e)}")
             raise
     
+    @staticmethod
+    def iter_credit_requests(batch_size=EXPORT_BATCH_SIZE):
+        """Percorre todas as solicitações em lotes (yield_per) para exportação,
+        devolvendo um dicionário por linha sem carregar a tabela inteira em memória"""
+        query = (
+            CreditRequest.query
+            .options(*CreditRequest.listing_options())
+            .order_by(CreditRequest.id)
+            .yield_per(batch_size)
+        )
+        for credit in query:
+            yield credit.to_dict()
+    
     @staticmethod
     def get_credit_requests_by_employee(employee_id):
         """Retorna todas as solicitações de crédito de um funcionário"""
         try:
-            requests = CreditRequest.query.filter_by(employee_id=employee_id).all()
+            requests = CreditRequest.query.options(
+                *CreditRequest.listing_options()
+            ).filter_by(employee_id=employee_id).all()
             logging.info(f"Buscando solicitações do funcionário {employee_id}. Total encontrado: {len(requests)}")
             return requests
         except Exception as e:
@@ -47,12 +70,38 @@ class CreditService:
             logging.error(f"Erro ao buscar solicitação: {str(e)}")
             raise
     
+    @staticmethod
+    def get_listing_version(employee_id=None, company_id=None, status=None):
+        """Versão das listagens de solicitações, para o ETag: número de linhas e última
+        alteração das solicitações, funcionários e empresas incluídos no to_dict.
+        
+        É uma única consulta agregada, bem mais barata do que carregar e serializar a listagem."""
+        query = db.session.query(
+            func.count(CreditRequest.id),
+            func.max(CreditRequest.updated_at),
+            func.max(Employee.updated_at),
+            func.max(Company.updated_at)
+        ).select_from(CreditRequest).join(
+            Employee, CreditRequest.employee_id == Employee.id
+        ).outerjoin(
+            Company, Employee.company_id == Company.id
+        )
+        if employee_id is not None:
+            query = query.filter(CreditRequest.employee_id == employee_id)
+        if company_id is not None:
+            query = query.filter(Employee.company_id == company_id)
+        if status:
+            query = query.filter(CreditRequest.status == status)
+        return tuple(query.one())
+    
     @staticmethod
     def get_credit_requests_by_company_and_status(company_id, status=None):
         """Retorna todas as solicitações de crédito de uma empresa, opcionalmente filtradas por status"""
         try:
             # Sempre filtra pela empresa do manager
-            query = CreditRequest.query.join(Employee).filter(Employee.company_id == company_id)
+            query = CreditRequest.query.options(
+                *CreditRequest.listing_options()
+            ).join(Employee).filter(Employee.company_id == company_id)
             
             if status:
                 query = query.filter(CreditRequest.status == status)
@@ -71,7 +120,9 @@ class CreditService:
     def get_pending_credit_requests_by_company(company_id):
         """Retorna todas as solicitações de crédito pendentes de uma empresa"""
         try:
-            requests = CreditRequest.query.join(Employee).filter(
+            requests = CreditRequest.query.options(
+                *CreditRequest.listing_options()
+            ).join(Employee).filter(
                 Employee.company_id == company_id,
                 CreditRequest.status == CreditRequestStatus.PENDING
             ).order_by(CreditRequest.created_at.desc()).all()
@@ -210,6 +261,7 @@ class CreditService:
             # Apply status update
             credit_request.status = status
             db.session.commit()
+            CreditService.invalidate_opportunities()
             
             logging.info(f"Status da solicitação {credit_id} atualizado para {status}")
             return credit_request, None
@@ -220,61 +272,119 @@ class CreditService:
             return None, f"Erro ao atualizar status: {str(e)}"
     
     @staticmethod
-    def get_funded_amount(credit_id):
-        credit_request = CreditRequest.query.get(credit_id)
-        if not credit_request:
-            return 0
+    def reconcile_funding(fix=False):
+        """Compara funded_amount/investor_count com a tabela de investimentos
         
-        return sum(investment.amount for investment in credit_request.investments)
+        Retorna a lista de divergências encontradas. Com fix=True corrige os contadores.
+        """
+        try:
+            totals = db.session.query(
+                Investment.credit_request_id,
+                func.sum(Investment.amount).label('funded_amount'),
+                func.count(func.distinct(Investment.employee_id)).label('investor_count')
+            ).group_by(Investment.credit_request_id).subquery()
+            
+            rows = db.session.query(
+                CreditRequest,
+                func.coalesce(totals.c.funded_amount, 0),
+                func.coalesce(totals.c.investor_count, 0)
+            ).outerjoin(totals, totals.c.credit_request_id == CreditRequest.id).all()
+            
+            mismatches = []
+            for credit_request, funded_amount, investor_count in rows:
+                if credit_request.funded_amount == funded_amount and credit_request.investor_count == investor_count:
+                    continue
+                
+                mismatches.append({
+                    'id': credit_request.id,
+                    'funded_amount': credit_request.funded_amount,
+                    'expected_funded_amount': funded_amount,
+                    'investor_count': credit_request.investor_count,
+                    'expected_investor_count': investor_count
+                })
+                if fix:
+                    credit_request.funded_amount = funded_amount
+                    credit_request.investor_count = investor_count
+            
+            if fix:
+                db.session.commit()
+                CreditService.invalidate_opportunities()
+            
+            logging.info(f"Reconciliação de financiamento: {len(mismatches)} divergências encontradas")
+            return mismatches
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Erro ao reconciliar financiamento: {str(e)}")
+            raise
+
+    @staticmethod
+    def _opportunities_cache():
+        return get_cache('opportunities', current_app.config.get('OPPORTUNITIES_CACHE_TTL', 30))
     
     @staticmethod
-    def check_fully_funded(credit_request):
-        funded_amount = CreditService.get_funded_amount(credit_request.id)
-        if funded_amount >= credit_request.amount:
-            credit_request.status = CreditRequestStatus.FUNDED
-            db.session.commit()
-            return True
-        return False
-
+    def invalidate_opportunities():
+        """Descarta as páginas em cache do feed de oportunidades. Chamar depois do commit
+        de qualquer alteração que mude o que está disponível para investimento."""
+        CreditService._opportunities_cache().invalidate()
+    
     @staticmethod
-    def get_available_credit_requests(employee_id=None):
-        """Retorna todas as solicitações de crédito aprovadas disponíveis para investimento"""
+    def get_available_credit_requests(employee_id=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Retorna uma página das solicitações de crédito aprovadas disponíveis para investimento
+        
+        Lida através da cache 'opportunities': a chave é o funcionário excluído (o próprio
+        leitor, ou nenhum), o tamanho da página e o cursor. Retorna a lista de solicitações
+        e o cursor da próxima página (None na última página).
+        """
+        key = f"{employee_id or '-'}:{limit}:{cursor or '-'}"
+        return CreditService._opportunities_cache().get_or_set(
+            key,
+            lambda: CreditService._query_available_credit_requests(employee_id, limit, cursor)
+        )
+    
+    @staticmethod
+    def _query_available_credit_requests(employee_id, limit, cursor):
+        """Consulta uma página do feed de oportunidades; o valor restante é filtrado na base
+        de dados a partir de funded_amount"""
         try:
             # Busca solicitações aprovadas que ainda não foram totalmente financiadas
-            query = CreditRequest.query.filter(
-                CreditRequest.status == CreditRequestStatus.APPROVED
+            query = db.session.query(
+                CreditRequest,
+                Employee.name.label('employee_name'),
+                Company.name.label('company_name')
+            ).join(
+                Employee, CreditRequest.employee_id == Employee.id
+            ).join(
+                Company, Employee.company_id == Company.id
+            ).filter(
+                CreditRequest.status == CreditRequestStatus.APPROVED,
+                CreditRequest.amount - CreditRequest.funded_amount > 0
             )
             
             # Se um employee_id for fornecido, exclui as solicitações desse funcionário
             if employee_id:
                 query = query.filter(CreditRequest.employee_id != employee_id)
             
-            requests = query.order_by(CreditRequest.created_at.desc()).all()
+            rows, next_cursor = keyset_page(query, CreditRequest.created_at, CreditRequest.id, limit, cursor)
             
             result = []
-            for request in requests:
-                # Calcula quanto já foi investido
-                invested_amount = sum(investment.amount for investment in request.investments)
-                remaining_amount = request.amount - invested_amount
-                
-                # Só inclui se ainda houver valor disponível para investimento
-                if remaining_amount > 0:
-                    result.append({
-                        'id': request.id,
-                        'amount': request.amount,
-                        'remaining_amount': remaining_amount,
-                        'interest_rate': request.interest_rate,
-                        'term_months': request.term_months,
-                        'purpose': request.purpose,
-                        'employee_name': request.employee.name,
-                        'company_name': request.employee.company.name,
-                        'created_at': request.created_at.isoformat(),
-                        'invested_amount': invested_amount,
-                        'investment_percentage': (invested_amount / request.amount) * 100
-                    })
+            for request, employee_name, company_name in rows:
+                invested_amount = request.funded_amount
+                result.append({
+                    'id': request.id,
+                    'amount': format_money(request.amount),
+                    'remaining_amount': format_money(request.amount - invested_amount),
+                    'interest_rate': request.interest_rate,
+                    'term_months': request.term_months,
+                    'purpose': request.purpose,
+                    'employee_name': employee_name,
+                    'company_name': company_name,
+                    'created_at': request.created_at,
+                    'invested_amount': format_money(invested_amount),
+                    'investment_percentage': float(invested_amount / request.amount * 100)
+                })
             
-            logging.info(f"Buscando solicitações disponíveis para investimento. Total encontrado: {len(result)}")
-            return result
+            logging.info(f"Buscando solicitações disponíveis para investimento. Total na página: {len(result)}")
+            return result, next_cursor
             
         except Exception as e:
             logging.error(f"Erro ao buscar solicitações disponíveis: {str(e)}")
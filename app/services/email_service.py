@@ -0,0 +1,237 @@
+from app import db
+from app.models.email_outbox import EmailOutbox, EmailStatus
+from app.utils.email import send_messages, render_invitation_email, render_metrics
+from flask import current_app
+import click
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, update
+import threading
+import logging
+import uuid
+
+class EmailService:
+    # Tempo durante o qual uma mensagem reclamada fica reservada para o remetente
+    CLAIM_LEASE_SECONDS = 300
+    DEFAULT_BATCH_SIZE = 50
+
+    @staticmethod
+    def queue_email(to, subject, html):
+        """Coloca uma mensagem já renderizada na outbox. Não faz commit: a mensagem
+        é gravada na mesma transação que a operação que a originou."""
+        message = EmailOutbox(
+            recipient=to,
+            subject=subject,
+            html=html,
+            status=EmailStatus.PENDING,
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        db.session.add(message)
+        return message
+
+    @staticmethod
+    def queue_emails(messages):
+        """Coloca várias mensagens (to, subject, html) na outbox com um único INSERT.
+        Tal como queue_email, não faz commit."""
+        if not messages:
+            return 0
+        now = datetime.utcnow()
+        db.session.execute(insert(EmailOutbox), [
+            {
+                'recipient': to,
+                'subject': subject,
+                'html': html,
+                'status': EmailStatus.PENDING,
+                'attempts': 0,
+                'next_attempt_at': now,
+                'created_at': now
+            }
+            for to, subject, html in messages
+        ])
+        return len(messages)
+
+    @staticmethod
+    def queue_invitation_email(invitation, invitation_type):
+        """Renderiza e coloca na outbox o email de convite (empresa ou funcionário)"""
+        subject, html = render_invitation_email(invitation, invitation_type)
+        return EmailService.queue_email(invitation.email, subject, html)
+
+    @staticmethod
+    def _claim_messages(batch_size):
+        """Reserva até batch_size mensagens pendentes e vencidas.
+
+        O UPDATE condicional garante que duas instâncias do remetente nunca
+        reclamam a mesma mensagem; a reserva expira ao fim de CLAIM_LEASE_SECONDS,
+        pelo que mensagens de um processo que morreu a meio voltam à fila."""
+        now = datetime.utcnow()
+        due_ids = db.session.execute(
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == EmailStatus.PENDING, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not due_ids:
+            return []
+
+        token = str(uuid.uuid4())
+        db.session.execute(
+            update(EmailOutbox)
+            .where(
+                EmailOutbox.id.in_(due_ids),
+                EmailOutbox.status == EmailStatus.PENDING,
+                EmailOutbox.next_attempt_at <= now
+            )
+            .values(
+                claim_token=token,
+                next_attempt_at=now + timedelta(seconds=EmailService.CLAIM_LEASE_SECONDS)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        return EmailOutbox.query.filter_by(claim_token=token).order_by(EmailOutbox.id).all()
+
+    @staticmethod
+    def _record_result(message, error=None):
+        """Atualiza a mensagem após uma tentativa de envio (sucesso, nova tentativa ou falha definitiva)"""
+        now = datetime.utcnow()
+        message.attempts += 1
+        message.claim_token = None
+        if error is None:
+            message.status = EmailStatus.SENT
+            message.sent_at = now
+            message.last_error = None
+            return EmailStatus.SENT
+
+        message.last_error = str(error)[:500]
+        if message.attempts >= current_app.config['EMAIL_MAX_ATTEMPTS']:
+            message.status = EmailStatus.FAILED
+            return EmailStatus.FAILED
+
+        # Backoff exponencial: base, 2*base, 4*base, ...
+        delay = current_app.config['EMAIL_RETRY_BASE_SECONDS'] * 2 ** (message.attempts - 1)
+        message.next_attempt_at = now + timedelta(seconds=delay)
+        return EmailStatus.PENDING
+
+    @staticmethod
+    def drain_outbox(batch_size=None):
+        """Envia um lote de mensagens pendentes da outbox.
+
+        Retorna um resumo com o número de mensagens enviadas, reagendadas e falhadas."""
+        batch_size = batch_size or EmailService.DEFAULT_BATCH_SIZE
+        summary = {'sent': 0, 'retried': 0, 'failed': 0}
+
+        messages = EmailService._claim_messages(batch_size)
+        # O lote inteiro segue pelas mesmas ligações SMTP do pool
+        errors = send_messages([(m.recipient, m.subject, m.html) for m in messages])
+        for message, error in zip(messages, errors):
+            if error is not None:
+                logging.error(f"Erro ao enviar email #{message.id} para {message.recipient}: {str(error)}")
+            result = EmailService._record_result(message, error)
+
+            if result == EmailStatus.SENT:
+                summary['sent'] += 1
+            elif result == EmailStatus.FAILED:
+                summary['failed'] += 1
+            else:
+                summary['retried'] += 1
+
+        if messages:
+            db.session.commit()
+        summary['claimed'] = len(messages)
+        return summary
+
+    @staticmethod
+    def drain_all(batch_size=None):
+        """Esvazia a outbox de tudo o que está vencido, lote a lote"""
+        totals = {'sent': 0, 'retried': 0, 'failed': 0, 'claimed': 0}
+        while True:
+            summary = EmailService.drain_outbox(batch_size)
+            for key in totals:
+                totals[key] += summary[key]
+            if not summary['claimed']:
+                return totals
+
+    @staticmethod
+    def get_metrics():
+        """Mensagens na outbox por estado e tempos de renderização deste processo"""
+        outbox = dict(
+            db.session.query(EmailOutbox.status, func.count(EmailOutbox.id))
+            .group_by(EmailOutbox.status)
+            .all()
+        )
+        return {'outbox': outbox, 'render': render_metrics.snapshot()}
+
+    @staticmethod
+    def start_worker(app):
+        """Inicia o remetente em segundo plano ao arrancar a aplicação, para que a outbox
+        (incluindo o que ficou pendente antes de um reinício) seja esvaziada a cada
+        EMAIL_OUTBOX_POLL_SECONDS mesmo sem novas mensagens.
+
+        Não é iniciado em testes nem nos comandos da CLI (flask email drain, flask db, ...),
+        exceto `flask run`, que serve pedidos."""
+        if not app.config.get('EMAIL_OUTBOX_WORKER') or app.testing:
+            return None
+        cli_context = click.get_current_context(silent=True)
+        if cli_context is not None and cli_context.info_name != 'run':
+            return None
+        worker = _OutboxWorker.for_app(app)
+        # Envia já o que estiver vencido, sem esperar pelo primeiro intervalo
+        worker.wake()
+        return worker
+
+    @staticmethod
+    def wake_worker():
+        """Acorda o remetente em segundo plano (iniciando-o se necessário).
+
+        Deve ser chamado depois do commit que gravou as mensagens na outbox."""
+        if not current_app.config.get('EMAIL_OUTBOX_WORKER'):
+            return
+        _OutboxWorker.for_app(current_app._get_current_object()).wake()
+
+
+class _OutboxWorker(threading.Thread):
+    """Thread daemon que envia as mensagens da outbox fora do ciclo do pedido HTTP"""
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, app):
+        super().__init__(name='email-outbox-worker', daemon=True)
+        self.app = app
+        self.event = threading.Event()
+        self.stopped = False
+
+    @classmethod
+    def for_app(cls, app):
+        with cls._lock:
+            worker = cls._instances.get(id(app))
+            if worker is None or not worker.is_alive():
+                worker = cls(app)
+                cls._instances[id(app)] = worker
+                worker.start()
+            return worker
+
+    def wake(self):
+        self.event.set()
+
+    def stop(self):
+        """Termina a thread depois do lote em curso"""
+        self.stopped = True
+        self.event.set()
+
+    def run(self):
+        poll_seconds = self.app.config['EMAIL_OUTBOX_POLL_SECONDS']
+        while True:
+            self.event.wait(poll_seconds)
+            self.event.clear()
+            if self.stopped:
+                return
+            with self.app.app_context():
+                try:
+                    EmailService.drain_all()
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Erro ao processar a outbox de emails: {str(e)}")
+                finally:
+                    db.session.remove()
@@ -3,13 +3,31 @@ from app.models.employee import Employee
 from app.models.company import Company
 from app.models.invitation import EmployeeInvitation, InvitationStatus
 from app.services.invitation_service import InvitationService
+from app.services.wallet_service import WalletService
+from app.utils.export import EXPORT_BATCH_SIZE
 from sqlalchemy.exc import IntegrityError
 
 class EmployeeService:
+    @staticmethod
+    def _provision_wallet(employee):
+        """Cria a carteira de um funcionário acabado de adicionar à sessão, sem commit
+        
+        A carteira é criada logo no registo para que as leituras nunca a tenham de criar.
+        """
+        db.session.flush()
+        return WalletService.provision_wallet(employee.id)
+    
     @staticmethod
     def get_all_employees():
         return Employee.query.all()
     
+    @staticmethod
+    def iter_employees(batch_size=EXPORT_BATCH_SIZE):
+        """Percorre todos os funcionários em lotes (yield_per) para exportação"""
+        query = Employee.query.order_by(Employee.id).yield_per(batch_size)
+        for employee in query:
+            yield employee.to_dict()
+    
     @staticmethod
     def get_employees_by_company(company_id):
         return Employee.query.filter_by(company_id=company_id).all()
@@ -29,7 +47,7 @@ class EmployeeService:
             return None, invitation_or_error
         
         # Verify email matches invitation
-        if invitation_or_error.email != data.get('email'):
+        if invitation_or_error.email.lower() != (data.get('email') or '').lower():
             return None, "Email does not match the invitation"
         
         # Set company_id from the invitation
@@ -50,6 +68,7 @@ class EmployeeService:
                 employee.password = data['password']
             
             db.session.add(employee)
+            EmployeeService._provision_wallet(employee)
             
             # Mark invitation as used
             invitation_or_error.is_used = True
@@ -136,6 +155,7 @@ class EmployeeService:
                 employee.password = data['password']
             
             db.session.add(employee)
+            EmployeeService._provision_wallet(employee)
             
             # Mark invitation as used
             invitation_or_error.is_used = True
@@ -1,9 +1,16 @@
 from app import db
 from app.models.investment import Investment
 from app.models.employee import Employee
+from app.models.company import Company
 from app.models.credit_request import CreditRequest, CreditRequestStatus
+from app.models.payment import Payment, PaymentType, PaymentStatus
+from app.models.types import format_money
 from app.services.credit_service import CreditService
+from app.services.wallet_service import WalletService
 from app.models.user import User
+from app.utils.pagination import keyset_page, DEFAULT_PAGE_SIZE
+from app.utils.export import EXPORT_BATCH_SIZE
+from sqlalchemy import and_, case, exists, func, select, update
 from datetime import datetime
 import logging
 
@@ -28,35 +35,277 @@ class InvestmentService:
         return Investment.query.get(investment_id)
     
     @staticmethod
-    def get_available_opportunities():
-        """Retorna todas as solicitações de crédito disponíveis para investimento"""
+    def _payment_totals_columns():
+        """Agregados dos pagamentos (a usar num SELECT agrupado sobre payments)"""
+        pending = Payment.status == PaymentStatus.PENDING
+        
+        def total(condition):
+            return func.coalesce(func.sum(case((condition, Payment.amount), else_=0)), 0)
+        
+        return (
+            total(Payment.status == PaymentStatus.PAID).label('total_paid'),
+            total(pending).label('total_pending'),
+            total(and_(pending, Payment.type == PaymentType.INTEREST)).label('total_interest'),
+            total(and_(pending, Payment.type == PaymentType.DIVIDEND)).label('total_dividend'),
+            func.min(case((pending, Payment.due_date))).label('next_payment_date')
+        )
+    
+    @staticmethod
+    def _payments_summary(row):
+        return {
+            'total_paid': format_money(row.total_paid or 0),
+            'total_pending': format_money(row.total_pending or 0),
+            'total_interest': format_money(row.total_interest or 0),
+            'total_dividend': format_money(row.total_dividend or 0),
+            'next_payment_date': row.next_payment_date
+        }
+    
+    @staticmethod
+    def get_investment_payment_totals(investment_ids):
+        """Totais dos pagamentos dos investimentos indicados, numa consulta agrupada"""
+        summaries = {
+            investment_id: {
+                'total_paid': format_money(0),
+                'total_pending': format_money(0),
+                'total_interest': format_money(0),
+                'total_dividend': format_money(0),
+                'next_payment_date': None
+            }
+            for investment_id in investment_ids
+        }
+        if not investment_ids:
+            return summaries
+        rows = db.session.execute(
+            select(Payment.investment_id, *InvestmentService._payment_totals_columns())
+            .where(Payment.investment_id.in_(investment_ids))
+            .group_by(Payment.investment_id)
+        )
+        for row in rows:
+            summaries[row.investment_id] = InvestmentService._payments_summary(row)
+        return summaries
+    
+    @staticmethod
+    def get_investment_payments(investment_ids):
+        """Detalhe dos pagamentos dos investimentos indicados, agrupado por investimento"""
+        payments = {investment_id: [] for investment_id in investment_ids}
+        if not investment_ids:
+            return payments
+        rows = db.session.execute(
+            select(
+                Payment.id, Payment.investment_id, Payment.type, Payment.amount,
+                Payment.status, Payment.due_date, Payment.paid_at
+            ).where(Payment.investment_id.in_(investment_ids)).order_by(Payment.due_date, Payment.id)
+        )
+        for row in rows:
+            payments[row.investment_id].append({
+                'id': row.id,
+                'type': row.type,
+                'amount': format_money(row.amount),
+                'status': row.status,
+                'due_date': row.due_date,
+                'paid_at': row.paid_at
+            })
+        return payments
+    
+    # Expansões opcionais da serialização de investimentos (?include=)
+    INCLUDES = ('credit_request', 'payments_summary', 'payments')
+    FIELDS = ('id', 'amount', 'employee_id', 'credit_request_id', 'created_at')
+    
+    @staticmethod
+    def _listing_query(filters, include):
+        """Consulta das listagens de investimentos: só as colunas que include pede.
+        
+        Os pagamentos ('payments_summary' e 'payments') são lidos à parte, só para as
+        linhas de cada página, em _listing_items."""
+        columns = [
+            Investment.id,
+            Investment.amount,
+            Investment.employee_id,
+            Investment.credit_request_id,
+            Investment.created_at
+        ]
+        if 'credit_request' in include:
+            columns += [
+                CreditRequest.amount.label('credit_amount'),
+                CreditRequest.interest_rate,
+                CreditRequest.term_months,
+                CreditRequest.purpose,
+                CreditRequest.status.label('credit_status'),
+                CreditRequest.created_at.label('credit_created_at'),
+                CreditRequest.funded_amount,
+                Employee.name.label('employee_name'),
+                Company.name.label('company_name')
+            ]
+        
+        query = db.session.query(*columns).filter(*filters)
+        if 'credit_request' in include:
+            query = query.join(
+                CreditRequest, Investment.credit_request_id == CreditRequest.id
+            ).join(
+                Employee, CreditRequest.employee_id == Employee.id
+            ).join(
+                Company, Employee.company_id == Company.id
+            )
+        return query
+    
+    @staticmethod
+    def _listing_items(rows, include):
+        """Converte as linhas de _listing_query em dicionários, lendo os totais e o
+        detalhe dos pagamentos das linhas recebidas (uma consulta cada) quando include
+        pede 'payments_summary' ou 'payments'"""
+        result = []
+        for row in rows:
+            item = {
+                'id': row.id,
+                'amount': format_money(row.amount),
+                'employee_id': row.employee_id,
+                'credit_request_id': row.credit_request_id,
+                'created_at': row.created_at
+            }
+            if 'credit_request' in include:
+                item['credit_request'] = {
+                    'id': row.credit_request_id,
+                    'amount': format_money(row.credit_amount),
+                    'interest_rate': row.interest_rate,
+                    'term_months': row.term_months,
+                    'purpose': row.purpose,
+                    'status': row.credit_status,
+                    'employee_name': row.employee_name,
+                    'company_name': row.company_name,
+                    'created_at': row.credit_created_at,
+                    'funded_amount': format_money(row.funded_amount),
+                    'investment_percentage': float(row.funded_amount / row.credit_amount * 100)
+                }
+            result.append(item)
+        
+        if 'payments_summary' in include:
+            totals = InvestmentService.get_investment_payment_totals([item['id'] for item in result])
+            for item in result:
+                item['payments_summary'] = totals[item['id']]
+        if 'payments' in include:
+            payments = InvestmentService.get_investment_payments([item['id'] for item in result])
+            for item in result:
+                item['payments'] = payments[item['id']]
+        return result
+    
+    @staticmethod
+    def get_listing_version(employee_id=None, credit_request_id=None):
+        """Versão das listagens de investimentos, para o ETag
+        
+        Os investimentos não mudam depois de criados; o que muda são as solicitações
+        (valor financiado, estado) e os pagamentos. Duas consultas agregadas: contagem e
+        última criação dos investimentos com a última alteração das solicitações, tomadores
+        e empresas; contagem e última alteração dos pagamentos."""
+        filters = []
+        if employee_id is not None:
+            filters.append(Investment.employee_id == employee_id)
+        if credit_request_id is not None:
+            filters.append(Investment.credit_request_id == credit_request_id)
+        
+        row = db.session.query(
+            func.count(Investment.id),
+            func.max(Investment.created_at),
+            func.max(CreditRequest.updated_at),
+            func.max(Employee.updated_at),
+            func.max(Company.updated_at)
+        ).select_from(Investment).join(
+            CreditRequest, Investment.credit_request_id == CreditRequest.id
+        ).join(
+            Employee, CreditRequest.employee_id == Employee.id
+        ).outerjoin(
+            Company, Employee.company_id == Company.id
+        ).filter(*filters).one()
+        payments = db.session.execute(
+            select(func.count(Payment.id), func.max(Payment.updated_at))
+            .join(Investment, Payment.investment_id == Investment.id)
+            .where(*filters)
+        ).one()
+        return tuple(row) + tuple(payments)
+    
+    @staticmethod
+    def list_investments(employee_id=None, credit_request_id=None, investment_id=None,
+                         include=(), limit=None, cursor=None):
+        """Lista investimentos como dicionários, lendo apenas o que include pede
+        
+        Sem include, cada linha tem só as colunas do investimento. 'credit_request' junta a
+        solicitação, o tomador e a empresa na mesma consulta; 'payments_summary' soma os
+        pagamentos da página numa consulta agrupada adicional (SUM/CASE e MIN(due_date));
+        'payments' lê o detalhe dos pagamentos da página numa consulta adicional.
+        Com limit, pagina por (created_at, id) e retorna também o cursor da próxima página.
+        """
+        try:
+            filters = []
+            if employee_id is not None:
+                filters.append(Investment.employee_id == employee_id)
+            if credit_request_id is not None:
+                filters.append(Investment.credit_request_id == credit_request_id)
+            if investment_id is not None:
+                filters.append(Investment.id == investment_id)
+            
+            query = InvestmentService._listing_query(filters, include)
+            
+            next_cursor = None
+            if limit:
+                rows, next_cursor = keyset_page(query, Investment.created_at, Investment.id, limit, cursor)
+            else:
+                rows = query.order_by(Investment.created_at.desc(), Investment.id.desc()).all()
+            
+            return InvestmentService._listing_items(rows, include), next_cursor
+        except ValueError:
+            raise
+        except Exception as e:
+            logging.error(f"Erro ao listar investimentos: {str(e)}")
+            raise
+    
+    @staticmethod
+    def iter_investments(include=(), batch_size=EXPORT_BATCH_SIZE):
+        """Percorre todos os investimentos em lotes (yield_per) para exportação
+        
+        Cada lote lido do cursor é convertido (e, com 'payments', completado) antes
+        de se ler o seguinte, pelo que a memória não cresce com o tamanho da tabela."""
+        query = InvestmentService._listing_query([], include)
+        result = db.session.execute(
+            query.order_by(Investment.id).statement,
+            execution_options={'yield_per': batch_size}
+        )
+        for rows in result.partitions():
+            yield from InvestmentService._listing_items(rows, include)
+    
+    @staticmethod
+    def get_portfolio_summary(employee_id):
+        """Totais da carteira de investimentos do funcionário, calculados em SQL"""
         try:
-            # Buscar solicitações aprovadas que ainda não foram totalmente financiadas
-            opportunities = CreditRequest.query.filter(
-                CreditRequest.status == CreditRequestStatus.APPROVED
-            ).all()
-            
-            result = []
-            for opp in opportunities:
-                # Calcular quanto já foi investido
-                invested_amount = sum(inv.amount for inv in opp.investments)
-                remaining_amount = opp.amount - invested_amount
-                
-                if remaining_amount > 0:
-                    result.append({
-                        'id': opp.id,
-                        'employee_name': opp.employee.name,
-                        'company_name': opp.employee.company.name,
-                        'amount': opp.amount,
-                        'remaining_amount': remaining_amount,
-                        'term_months': opp.term_months,
-                        'interest_rate': opp.interest_rate,
-                        'purpose': opp.purpose,
-                        'created_at': opp.created_at.isoformat()
-                    })
-            
-            return result
+            investments = db.session.execute(
+                select(
+                    func.count(Investment.id).label('investment_count'),
+                    func.count(func.distinct(Investment.credit_request_id)).label('credit_request_count'),
+                    func.coalesce(func.sum(Investment.amount), 0).label('total_invested')
+                ).where(Investment.employee_id == employee_id)
+            ).one()
+            payments = db.session.execute(
+                select(*InvestmentService._payment_totals_columns())
+                .select_from(Payment)
+                .join(Investment, Payment.investment_id == Investment.id)
+                .where(Investment.employee_id == employee_id)
+            ).one()
             
+            return {
+                'investment_count': investments.investment_count,
+                'credit_request_count': investments.credit_request_count,
+                'total_invested': format_money(investments.total_invested),
+                **InvestmentService._payments_summary(payments)
+            }
+        except Exception as e:
+            logging.error(f"Erro ao calcular resumo da carteira: {str(e)}")
+            raise
+    
+    @staticmethod
+    def get_available_opportunities(limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Retorna uma página das solicitações de crédito disponíveis para investimento"""
+        try:
+            return CreditService.get_available_credit_requests(limit=limit, cursor=cursor)
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f'Erro ao buscar oportunidades: {str(e)}')
     
@@ -81,9 +330,8 @@ class InvestmentService:
             if credit_request.employee_id == employee_id:
                 return 'Não é possível investir em sua própria solicitação de crédito', 400
             
-            # Calcular quanto já foi investido
-            invested_amount = sum(inv.amount for inv in credit_request.investments)
-            remaining_amount = credit_request.amount - invested_amount
+            # Calcular quanto ainda falta financiar
+            remaining_amount = credit_request.amount - credit_request.funded_amount
             
             # Validar o valor do investimento
             if amount < InvestmentService.MIN_INVESTMENT_AMOUNT:
@@ -92,25 +340,66 @@ class InvestmentService:
             if amount > remaining_amount:
                 return f'O valor máximo disponível para investimento é Kzs {remaining_amount:.2f}', 400
             
-            # Criar o investimento
+            # Reservar o valor com um UPDATE condicional: só é aplicado se ainda houver saldo
+            # por financiar, o que evita sobrefinanciamento com investidores concorrentes.
+            # A ordem das atribuições importa no MySQL, que avalia o SET da esquerda para a direita.
+            new_funded_amount = CreditRequest.funded_amount + amount
+            is_new_investor = ~exists().where(
+                Investment.credit_request_id == CreditRequest.id,
+                Investment.employee_id == employee_id
+            )
+            result = db.session.execute(
+                update(CreditRequest)
+                .where(
+                    CreditRequest.id == credit_request_id,
+                    CreditRequest.status == CreditRequestStatus.APPROVED,
+                    new_funded_amount <= CreditRequest.amount
+                )
+                .ordered_values(
+                    (CreditRequest.status, case(
+                        (new_funded_amount >= CreditRequest.amount, CreditRequestStatus.FUNDED),
+                        else_=CreditRequest.status
+                    )),
+                    (CreditRequest.investor_count, CreditRequest.investor_count + case((is_new_investor, 1), else_=0)),
+                    (CreditRequest.funded_amount, new_funded_amount),
+                    (CreditRequest.updated_at, datetime.utcnow())
+                )
+                .execution_options(synchronize_session=False)
+            )
+            
+            if result.rowcount == 0:
+                # Outro investimento foi confirmado entretanto
+                db.session.rollback()
+                credit_request = CreditRequest.query.get(credit_request_id)
+                if credit_request.status != CreditRequestStatus.APPROVED:
+                    return 'A solicitação de crédito não está disponível para investimento', 400
+                remaining_amount = credit_request.amount - credit_request.funded_amount
+                return f'O valor máximo disponível para investimento é Kzs {remaining_amount:.2f}', 400
+            
+            # Criar o investimento na mesma transação
             investment = Investment(
                 employee_id=employee_id,
                 credit_request_id=credit_request_id,
                 amount=amount,
                 created_at=datetime.utcnow()
             )
-            
             db.session.add(investment)
-            db.session.commit()
+            db.session.flush()
             
-            # Verificar se a solicitação foi totalmente financiada
-            new_invested_amount = invested_amount + amount
-            if new_invested_amount >= credit_request.amount:
-                credit_request.status = CreditRequestStatus.FUNDED
-                db.session.commit()
+            # Se este investimento completou o financiamento, agenda os pagamentos de todos
+            # os investidores na mesma transação
+            status = db.session.execute(
+                select(CreditRequest.status).where(CreditRequest.id == credit_request_id)
+            ).scalar_one()
+            if status == CreditRequestStatus.FUNDED:
+                WalletService.schedule_credit_request_payments(credit_request_id)
+            
+            db.session.commit()
+            # O valor por financiar mudou (e a solicitação pode ter saído do feed)
+            CreditService.invalidate_opportunities()
             
             logging.info(f"Novo investimento criado: ID={investment.id}, Valor={amount}, Funcionário={employee_id}, Solicitação={credit_request_id}")
-            return investment.to_dict()
+            return investment.to_dict(include=('credit_request',))
             
         except Exception as e:
             db.session.rollback()
@@ -1,14 +1,22 @@
 from app import db
-from app.models.invitation import CompanyInvitation, EmployeeInvitation, InvitationStatus
-from app.utils.email import send_invitation_email
+from app.models.invitation import CompanyInvitation, EmployeeInvitation, InvitationStatus, effective_status
+from app.services.email_service import EmailService
+from app.utils.email import render_invitation_emails
 from datetime import datetime, timedelta
+from sqlalchemy import insert, select, update
 from sqlalchemy.exc import IntegrityError
 import uuid
 import logging
+import re
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
 
 class InvitationService:
     # Default expiration period for invitations (in days)
     INVITATION_EXPIRY_DAYS = 7
+    # Maximum number of rows accepted by a single bulk invitation request
+    MAX_BULK_INVITATIONS = 5000
+    EMPLOYEE_ROLES = ('employee', 'manager')
     
     @staticmethod
     def create_company_invitation(email, created_by=None):
@@ -22,8 +30,10 @@ class InvitationService:
             ).first()
             
             if existing_invitation and existing_invitation.expires_at > datetime.utcnow():
-                # Send email with the existing invitation
-                send_invitation_email(existing_invitation, 'company')
+                # Queue email with the existing invitation
+                EmailService.queue_invitation_email(existing_invitation, 'company')
+                db.session.commit()
+                EmailService.wake_worker()
                 return existing_invitation, None
             
             # Create new invitation
@@ -36,10 +46,12 @@ class InvitationService:
             )
             
             db.session.add(invitation)
-            db.session.commit()
             
-            # Send email with the new invitation
-            send_invitation_email(invitation, 'company')
+            # Queue email with the new invitation in the same transaction,
+            # so the invitation is never saved without its email (or vice versa)
+            EmailService.queue_invitation_email(invitation, 'company')
+            db.session.commit()
+            EmailService.wake_worker()
             
             return invitation, None
             
@@ -67,9 +79,8 @@ class InvitationService:
         if invitation.is_used or invitation.status == InvitationStatus.USED:
             return False, "Invitation has already been used"
         
-        if invitation.expires_at < datetime.utcnow():
-            invitation.status = InvitationStatus.EXPIRED
-            db.session.commit()
+        # Read-only: expired rows are persisted by expire_invitations()
+        if effective_status(invitation) == InvitationStatus.EXPIRED:
             return False, "Invitation has expired"
         
         return True, invitation
@@ -84,6 +95,10 @@ class InvitationService:
     @staticmethod
     def create_employee_invitation(email, company_id, created_by=None, role='employee'):
         """Create an invitation for an employee to register"""
+        if not isinstance(email, str):
+            return None, "Invalid email"
+        # Emails are stored lowercase, so lookups can compare them with a plain equality/IN
+        email = email.strip().lower()
         try:
             # Check if an active invitation already exists
             existing_invitation = EmployeeInvitation.query.filter_by(
@@ -94,8 +109,10 @@ class InvitationService:
             ).first()
             
             if existing_invitation and existing_invitation.expires_at > datetime.utcnow():
-                # Send email with the existing invitation
-                send_invitation_email(existing_invitation, 'employee')
+                # Queue email with the existing invitation
+                EmailService.queue_invitation_email(existing_invitation, 'employee')
+                db.session.commit()
+                EmailService.wake_worker()
                 return existing_invitation, None
             
             # Create new invitation
@@ -110,10 +127,12 @@ class InvitationService:
             )
             
             db.session.add(invitation)
-            db.session.commit()
             
-            # Send email with the new invitation
-            send_invitation_email(invitation, 'employee')
+            # Queue email with the new invitation in the same transaction,
+            # so the invitation is never saved without its email (or vice versa)
+            EmailService.queue_invitation_email(invitation, 'employee')
+            db.session.commit()
+            EmailService.wake_worker()
             
             return invitation, None
             
@@ -124,6 +143,98 @@ class InvitationService:
             db.session.rollback()
             return None, f"Error creating invitation: {str(e)}"
     
+    @staticmethod
+    def create_employee_invitations_bulk(rows, company_id, created_by=None):
+        """Create employee invitations for many emails at once.
+
+        rows is a list of dicts with 'email' and an optional 'role'. Existing
+        pending invitations are found with a single query, all new invitations
+        are inserted with a single statement and their emails are queued in the
+        same transaction. Returns (report, error), where report has one entry
+        per input row.
+        """
+        if len(rows) > InvitationService.MAX_BULK_INVITATIONS:
+            return None, f"Máximo de {InvitationService.MAX_BULK_INVITATIONS} convites por pedido"
+
+        try:
+            results = []
+            candidates = {}
+            for index, row in enumerate(rows, start=1):
+                # JSON rows may carry any type; a non-string value invalidates only its row
+                email = row.get('email')
+                role = row.get('role') or 'employee'
+                if isinstance(email, str):
+                    # Emails are stored lowercase, so the same address is never invited twice
+                    email = email.strip().lower()
+                if isinstance(role, str):
+                    role = role.strip()
+                result = {'row': index, 'email': email, 'role': role}
+                results.append(result)
+
+                if not isinstance(email, str) or not EMAIL_PATTERN.match(email):
+                    result.update(status='invalid', message='Email inválido')
+                elif not isinstance(role, str) or role not in InvitationService.EMPLOYEE_ROLES:
+                    result.update(status='invalid', message='Função deve ser "employee" ou "manager"')
+                elif email in candidates:
+                    result.update(status='duplicate', message='Email repetido no pedido')
+                else:
+                    candidates[email] = result
+
+            # Single query for every pending invitation already sent to these emails
+            now = datetime.utcnow()
+            existing = set()
+            if candidates:
+                existing = set(
+                    db.session.execute(
+                        select(EmployeeInvitation.email).where(
+                            EmployeeInvitation.company_id == company_id,
+                            EmployeeInvitation.status == InvitationStatus.PENDING,
+                            EmployeeInvitation.is_used == False,
+                            EmployeeInvitation.expires_at > now,
+                            EmployeeInvitation.email.in_(list(candidates))
+                        )
+                    ).scalars()
+                )
+
+            expires_at = now + timedelta(days=InvitationService.INVITATION_EXPIRY_DAYS)
+            new_rows = []
+            for key, result in candidates.items():
+                if key in existing:
+                    result.update(status='existing', message='Já existe um convite pendente para este email')
+                    continue
+                new_rows.append({
+                    'email': result['email'],
+                    'company_id': company_id,
+                    'invitation_code': str(uuid.uuid4()),
+                    'is_used': False,
+                    'status': InvitationStatus.PENDING,
+                    'role': result['role'],
+                    'created_at': now,
+                    'expires_at': expires_at,
+                    'created_by': created_by
+                })
+                result.update(status='created', expires_at=expires_at)
+
+            if new_rows:
+                db.session.execute(insert(EmployeeInvitation), new_rows)
+                rendered = render_invitation_emails(new_rows, 'employee')
+                EmailService.queue_emails([
+                    (row['email'], subject, html) for row, (subject, html) in zip(new_rows, rendered)
+                ])
+                db.session.commit()
+                EmailService.wake_worker()
+
+            return results, None
+
+        except IntegrityError as e:
+            db.session.rollback()
+            logging.error(f"Erro de integridade ao criar convites em lote para a empresa {company_id}: {str(e)}")
+            return None, "Não foi possível criar os convites, tente novamente"
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Erro ao criar convites em lote para a empresa {company_id}: {str(e)}")
+            return None, "Erro ao criar os convites"
+
     @staticmethod
     def validate_employee_invitation(invitation_code):
         """Validate an employee invitation code"""
@@ -135,9 +246,8 @@ class InvitationService:
         if invitation.is_used or invitation.status == InvitationStatus.USED:
             return False, "Invitation has already been used"
         
-        if invitation.expires_at < datetime.utcnow():
-            invitation.status = InvitationStatus.EXPIRED
-            db.session.commit()
+        # Read-only: expired rows are persisted by expire_invitations()
+        if effective_status(invitation) == InvitationStatus.EXPIRED:
             return False, "Invitation has expired"
         
         return True, invitation
@@ -149,6 +259,35 @@ class InvitationService:
         invitation.status = InvitationStatus.USED
         db.session.commit()
 
+    @staticmethod
+    def expire_invitations(now=None):
+        """Mark every pending invitation past its expiry date as expired.
+
+        One bulk UPDATE per invitation table; validation never writes, so this
+        sweeper is what keeps the stored status in step. Returns the number of
+        rows updated per table."""
+        now = now or datetime.utcnow()
+        try:
+            expired = {}
+            for name, model in (('company', CompanyInvitation), ('employee', EmployeeInvitation)):
+                result = db.session.execute(
+                    update(model)
+                    .where(
+                        model.status == InvitationStatus.PENDING,
+                        model.is_used == False,
+                        model.expires_at <= now
+                    )
+                    .values(status=InvitationStatus.EXPIRED)
+                    .execution_options(synchronize_session=False)
+                )
+                expired[name] = result.rowcount
+            db.session.commit()
+            return expired
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Erro ao expirar convites: {str(e)}")
+            raise
+
     @staticmethod
     def get_company_invitations(company_id, status=None):
         """Retorna todos os convites da empresa, opcionalmente filtrados por status"""
@@ -162,7 +301,7 @@ class InvitationService:
                 elif status == 'used':
                     query = query.filter_by(is_used=True)
                 elif status == 'expired':
-                    query = query.filter(EmployeeInvitation.expires_at <= datetime.utcnow())
+                    query = query.filter_by(is_used=False).filter(EmployeeInvitation.expires_at <= datetime.utcnow())
             
             # Order by creation date, most recent first
             query = query.order_by(EmployeeInvitation.created_at.desc())
@@ -3,43 +3,126 @@ from app.models.wallet import Wallet
 from app.models.wallet_transaction import WalletTransaction, TransactionType
 from app.models.payment import Payment, PaymentType, PaymentStatus
 from app.models.investment import Investment
+from app.models.credit_request import CreditRequest
+from app.models.types import Money, format_money, to_money
+from sqlalchemy import bindparam, insert, select, update
+from app.utils.pagination import keyset_page, DEFAULT_PAGE_SIZE
+from flask import Flask, current_app
+from decimal import Decimal
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import time
 
 class WalletService:
     @staticmethod
-    def get_wallet_by_employee(employee_id):
-        """Retorna a carteira de um funcionário"""
+    def get_wallet_view(employee_id):
+        """Retorna a carteira do funcionário sem escrever na base de dados
+        
+        Se a carteira ainda não existir, devolve uma carteira com saldo zero.
+        """
         try:
             wallet = Wallet.query.filter_by(employee_id=employee_id).first()
-            if not wallet:
-                # Cria uma nova carteira se não existir
-                wallet = Wallet(employee_id=employee_id)
-                db.session.add(wallet)
-                db.session.commit()
-            return wallet
+            if wallet:
+                return wallet.to_dict()
+            return {
+                'id': None,
+                'employee_id': employee_id,
+                'balance': 0.0,
+                'created_at': None,
+                'updated_at': None,
+                'employee_name': None
+            }
         except Exception as e:
-            db.session.rollback()
             logging.error(f"Erro ao buscar carteira: {str(e)}")
             raise
     
+    @staticmethod
+    def provision_wallet(employee_id):
+        """Cria a carteira de um novo funcionário, sem commit"""
+        wallet = Wallet(employee_id=employee_id)
+        db.session.add(wallet)
+        return wallet
+    
+    @staticmethod
+    def _change_balance(employee_id, amount):
+        """Aplica um crédito (amount > 0) ou débito (amount < 0) com um único UPDATE condicional
+        
+        Não carrega a carteira nem faz commit. Retorna {'id', 'employee_id', 'balance'} ou None
+        quando o débito não pode ser aplicado (carteira inexistente ou saldo insuficiente).
+        """
+        stmt = update(Wallet).where(Wallet.employee_id == employee_id).values(balance=Wallet.balance + amount)
+        if amount < 0:
+            stmt = stmt.where(Wallet.balance >= -amount)
+        stmt = stmt.execution_options(synchronize_session=False)
+        
+        if db.engine.dialect.update_returning:
+            row = db.session.execute(stmt.returning(Wallet.id, Wallet.balance)).first()
+        else:
+            # Sem RETURNING (MySQL): a linha fica bloqueada pelo UPDATE até ao commit
+            row = None
+            if db.session.execute(stmt).rowcount:
+                row = db.session.execute(
+                    select(Wallet.id, Wallet.balance).where(Wallet.employee_id == employee_id)
+                ).first()
+        
+        if row is None:
+            return None
+        return {'id': row.id, 'employee_id': employee_id, 'balance': format_money(row.balance)}
+    
+    @staticmethod
+    def credit(employee_id, amount, type, description, investment_id=None):
+        """Credita a carteira e regista a transação, sem commit"""
+        if amount <= 0:
+            raise ValueError("O valor deve ser maior que zero")
+        
+        wallet = WalletService._change_balance(employee_id, amount)
+        if wallet is None:
+            # Carteira ainda não existe: cria-a na mesma transação
+            db.session.add(Wallet(employee_id=employee_id))
+            db.session.flush()
+            wallet = WalletService._change_balance(employee_id, amount)
+        
+        transaction = WalletTransaction(
+            wallet_id=wallet['id'],
+            type=type,
+            amount=amount,
+            description=description,
+            investment_id=investment_id
+        )
+        db.session.add(transaction)
+        return wallet, transaction
+    
+    @staticmethod
+    def debit(employee_id, amount, type, description, investment_id=None):
+        """Debita a carteira se houver saldo e regista a transação, sem commit"""
+        if amount <= 0:
+            raise ValueError("O valor deve ser maior que zero")
+        
+        wallet = WalletService._change_balance(employee_id, -amount)
+        if wallet is None:
+            raise ValueError("Saldo insuficiente")
+        
+        transaction = WalletTransaction(
+            wallet_id=wallet['id'],
+            type=type,
+            amount=amount,
+            description=description,
+            investment_id=investment_id
+        )
+        db.session.add(transaction)
+        return wallet, transaction
+    
     @staticmethod
     def deposit(employee_id, amount):
         """Realiza um depósito na carteira do funcionário"""
         try:
-            wallet = WalletService.get_wallet_by_employee(employee_id)
-            
-            # Adiciona o saldo
-            wallet.add_balance(amount)
-            
-            # Registra a transação
-            transaction = WalletTransaction(
-                wallet_id=wallet.id,
-                type=TransactionType.DEPOSIT,
-                amount=amount,
-                description=f"Depósito de Kzs {amount:.2f}"
+            wallet, transaction = WalletService.credit(
+                employee_id,
+                amount,
+                TransactionType.DEPOSIT,
+                f"Depósito de Kzs {amount:.2f}"
             )
-            db.session.add(transaction)
             db.session.commit()
             
             return wallet, transaction
@@ -52,19 +135,12 @@ class WalletService:
     def withdraw(employee_id, amount):
         """Realiza um saque da carteira do funcionário"""
         try:
-            wallet = WalletService.get_wallet_by_employee(employee_id)
-            
-            # Subtrai o saldo
-            wallet.subtract_balance(amount)
-            
-            # Registra a transação
-            transaction = WalletTransaction(
-                wallet_id=wallet.id,
-                type=TransactionType.WITHDRAWAL,
-                amount=amount,
-                description=f"Saque de Kzs {amount:.2f}"
+            wallet, transaction = WalletService.debit(
+                employee_id,
+                amount,
+                TransactionType.WITHDRAWAL,
+                f"Saque de Kzs {amount:.2f}"
             )
-            db.session.add(transaction)
             db.session.commit()
             
             return wallet, transaction
@@ -77,24 +153,18 @@ class WalletService:
     def invest(employee_id, investment_id, amount):
         """Realiza um investimento usando o saldo da carteira"""
         try:
-            wallet = WalletService.get_wallet_by_employee(employee_id)
             investment = Investment.query.get(investment_id)
             
             if not investment:
                 raise ValueError("Investimento não encontrado")
             
-            # Subtrai o saldo
-            wallet.subtract_balance(amount)
-            
-            # Registra a transação
-            transaction = WalletTransaction(
-                wallet_id=wallet.id,
-                type=TransactionType.INVESTMENT,
-                amount=amount,
-                description=f"Investimento em solicitação #{investment.credit_request_id}",
+            wallet, transaction = WalletService.debit(
+                employee_id,
+                amount,
+                TransactionType.INVESTMENT,
+                f"Investimento em solicitação #{investment.credit_request_id}",
                 investment_id=investment_id
             )
-            db.session.add(transaction)
             db.session.commit()
             
             return wallet, transaction
@@ -104,34 +174,82 @@ class WalletService:
             raise
     
     @staticmethod
-    def get_transactions(employee_id, transaction_type=None):
-        """Retorna as transações da carteira do funcionário"""
+    def get_transactions(employee_id, transaction_types=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Retorna uma página das transações da carteira do funcionário, das mais recentes para as mais antigas
+        
+        A carteira é resolvida uma vez, pelo que a página é lida apenas pelo índice
+        (wallet_id[, type], created_at). Retorna as transações e o cursor da próxima página.
+        """
         try:
-            wallet = WalletService.get_wallet_by_employee(employee_id)
-            query = WalletTransaction.query.filter_by(wallet_id=wallet.id)
+            wallet_id = db.session.execute(
+                select(Wallet.id).where(Wallet.employee_id == employee_id)
+            ).scalar()
+            if wallet_id is None:
+                return [], None
             
-            if transaction_type:
-                query = query.filter_by(type=transaction_type)
+            query = WalletTransaction.query.filter(WalletTransaction.wallet_id == wallet_id)
             
-            return query.order_by(WalletTransaction.created_at.desc()).all()
+            if transaction_types:
+                query = query.filter(WalletTransaction.type.in_(transaction_types))
+            
+            return keyset_page(query, WalletTransaction.created_at, WalletTransaction.id, limit, cursor)
+        except ValueError:
+            raise
         except Exception as e:
             logging.error(f"Erro ao buscar transações: {str(e)}")
             raise
     
     @staticmethod
-    def get_payments(employee_id, status=None):
-        """Retorna os pagamentos de dividendos/juros do funcionário"""
+    def get_payments(employee_id, status=None, upcoming_days=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Retorna uma página dos pagamentos de dividendos/juros do funcionário
+        
+        Uma única consulta (pagamentos JOIN investimentos), paginada por (due_date, id):
+        dos mais recentes para os mais antigos, ou, com upcoming_days, apenas os pagamentos
+        pendentes que vencem nos próximos upcoming_days dias, do mais próximo para o mais distante.
+        Retorna a lista de pagamentos (dicionários) e o cursor da próxima página.
+        """
         try:
-            wallet = WalletService.get_wallet_by_employee(employee_id)
-            investments = Investment.query.filter_by(employee_id=employee_id).all()
-            investment_ids = [inv.id for inv in investments]
-            
-            query = Payment.query.filter(Payment.investment_id.in_(investment_ids))
+            query = db.session.query(
+                Payment.id,
+                Payment.investment_id,
+                Investment.credit_request_id,
+                Payment.type,
+                Payment.amount,
+                Payment.status,
+                Payment.due_date,
+                Payment.paid_at
+            ).join(
+                Investment, Payment.investment_id == Investment.id
+            ).filter(Investment.employee_id == employee_id)
             
             if status:
-                query = query.filter_by(status=status)
+                query = query.filter(Payment.status == status)
+            
+            if upcoming_days:
+                now = datetime.utcnow()
+                query = query.filter(
+                    Payment.status == PaymentStatus.PENDING,
+                    Payment.due_date >= now,
+                    Payment.due_date < now + timedelta(days=upcoming_days)
+                )
+            
+            rows, next_cursor = keyset_page(
+                query, Payment.due_date, Payment.id, limit, cursor, descending=not upcoming_days
+            )
             
-            return query.order_by(Payment.due_date.desc()).all()
+            payments = [{
+                'id': row.id,
+                'investment_id': row.investment_id,
+                'credit_request_id': row.credit_request_id,
+                'type': row.type,
+                'amount': format_money(row.amount),
+                'status': row.status,
+                'due_date': row.due_date,
+                'paid_at': row.paid_at
+            } for row in rows]
+            return payments, next_cursor
+        except ValueError:
+            raise
         except Exception as e:
             logging.error(f"Erro ao buscar pagamentos: {str(e)}")
             raise
@@ -147,21 +265,14 @@ class WalletService:
             if payment.status != PaymentStatus.PENDING:
                 raise ValueError("Pagamento já processado")
             
-            # Obtém a carteira do funcionário
-            wallet = WalletService.get_wallet_by_employee(payment.investment.employee_id)
-            
-            # Adiciona o valor à carteira
-            wallet.add_balance(payment.amount)
-            
-            # Registra a transação
-            transaction = WalletTransaction(
-                wallet_id=wallet.id,
-                type=TransactionType.DIVIDEND if payment.type == PaymentType.DIVIDEND else TransactionType.INTEREST,
-                amount=payment.amount,
-                description=f"Recebimento de {payment.type} do investimento #{payment.investment_id}",
+            # Credita a carteira do funcionário e regista a transação
+            wallet, transaction = WalletService.credit(
+                payment.investment.employee_id,
+                payment.amount,
+                TransactionType.DIVIDEND if payment.type == PaymentType.DIVIDEND else TransactionType.INTEREST,
+                f"Recebimento de {payment.type} do investimento #{payment.investment_id}",
                 investment_id=payment.investment_id
             )
-            db.session.add(transaction)
             
             # Marca o pagamento como realizado
             payment.mark_as_paid()
@@ -173,6 +284,286 @@ class WalletService:
             logging.error(f"Erro ao processar pagamento: {str(e)}")
             raise
     
+    # Tamanho por omissão dos lotes do processamento de pagamentos vencidos
+    DUE_PAYMENTS_BATCH_SIZE = 500
+    
+    @staticmethod
+    def _due_payments_query(as_of, batch_size, after_id=0, partition=None):
+        """Seleciona um lote de pagamentos pendentes vencidos, por ordem de id
+        
+        partition=(index, count) restringe o lote às carteiras com wallet_id % count == index,
+        pelo que partições diferentes nunca atualizam a mesma carteira. Com partição, só são
+        vistos os pagamentos de funcionários que já têm carteira (ver _provision_due_wallets).
+        """
+        query = (
+            select(Payment.id, Payment.investment_id, Payment.type, Payment.amount, Investment.employee_id)
+            .join(Investment, Payment.investment_id == Investment.id)
+            .where(
+                Payment.status == PaymentStatus.PENDING,
+                Payment.due_date <= as_of,
+                Payment.id > after_id
+            )
+            .order_by(Payment.id)
+            .limit(batch_size)
+        )
+        if partition:
+            index, count = partition
+            query = query.join(Wallet, Wallet.employee_id == Investment.employee_id).where(Wallet.id % count == index)
+        if db.engine.dialect.name in ('postgresql', 'mysql'):
+            # Lotes já reclamados por outro processo são ignorados em vez de bloquear
+            query = query.with_for_update(skip_locked=True, of=Payment)
+        return query
+    
+    @staticmethod
+    def _provision_due_wallets(as_of):
+        """Cria as carteiras em falta dos funcionários com pagamentos vencidos
+        
+        Feito uma vez antes de lançar os processos, para que cada pagamento pertença
+        a uma partição de carteiras.
+        """
+        missing = db.session.execute(
+            select(Investment.employee_id).distinct()
+            .join(Payment, Payment.investment_id == Investment.id)
+            .outerjoin(Wallet, Wallet.employee_id == Investment.employee_id)
+            .where(
+                Payment.status == PaymentStatus.PENDING,
+                Payment.due_date <= as_of,
+                Wallet.id.is_(None)
+            )
+        ).scalars().all()
+        if missing:
+            now = datetime.utcnow()
+            db.session.execute(insert(Wallet), [
+                {'employee_id': employee_id, 'balance': 0, 'created_at': now, 'updated_at': now}
+                for employee_id in missing
+            ])
+            db.session.commit()
+        return len(missing)
+    
+    @staticmethod
+    def _settle_payments(payments):
+        """Liquida um lote de pagamentos, sem commit
+        
+        Marca os pagamentos como pagos, aplica um único UPDATE por carteira com o total do lote
+        e insere as transações em lote. Retorna o número de pagamentos liquidados, ou 0 se algum
+        pagamento do lote já tiver sido processado por outro processo (o lote deve ser revertido).
+        """
+        now = datetime.utcnow()
+        payment_ids = [p.id for p in payments]
+        
+        # Reclama os pagamentos: só os que ainda estão pendentes são marcados
+        claimed = db.session.execute(
+            update(Payment)
+            .where(Payment.id.in_(payment_ids), Payment.status == PaymentStatus.PENDING)
+            .values(status=PaymentStatus.PAID, paid_at=now, updated_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != len(payment_ids):
+            return 0
+        
+        # Agrega os créditos por funcionário
+        credits = {}
+        for payment in payments:
+            credits[payment.employee_id] = credits.get(payment.employee_id, 0) + payment.amount
+        
+        wallet_ids = dict(db.session.execute(
+            select(Wallet.employee_id, Wallet.id).where(Wallet.employee_id.in_(credits.keys()))
+        ).all())
+        missing = [employee_id for employee_id in credits if employee_id not in wallet_ids]
+        if missing:
+            # Funcionários registados antes do provisionamento automático de carteiras
+            db.session.execute(insert(Wallet), [
+                {'employee_id': employee_id, 'balance': 0, 'created_at': now, 'updated_at': now}
+                for employee_id in missing
+            ])
+            wallet_ids.update(db.session.execute(
+                select(Wallet.employee_id, Wallet.id).where(Wallet.employee_id.in_(missing))
+            ).all())
+        
+        wallets = Wallet.__table__
+        db.session.execute(
+            wallets.update()
+            .where(wallets.c.id == bindparam('wallet_id'))
+            .values(balance=wallets.c.balance + bindparam('credit', type_=Money), updated_at=now),
+            [{'wallet_id': wallet_ids[employee_id], 'credit': credit} for employee_id, credit in credits.items()]
+        )
+        
+        db.session.execute(insert(WalletTransaction), [{
+            'wallet_id': wallet_ids[payment.employee_id],
+            'type': TransactionType.DIVIDEND if payment.type == PaymentType.DIVIDEND else TransactionType.INTEREST,
+            'amount': payment.amount,
+            'description': f"Recebimento de {payment.type} do investimento #{payment.investment_id}",
+            'investment_id': payment.investment_id,
+            'created_at': now
+        } for payment in payments])
+        
+        return len(payments)
+    
+    @staticmethod
+    def process_due_payments(as_of=None, batch_size=None, partition=None):
+        """Processa todos os pagamentos pendentes vencidos até as_of, em lotes
+        
+        Cada lote é confirmado numa transação própria, pelo que o processamento pode ser
+        retomado após uma falha: os lotes já confirmados deixam de estar pendentes.
+        Retorna um resumo com o número de pagamentos, valor total e débito (pagamentos/s).
+        """
+        as_of = as_of or datetime.utcnow()
+        batch_size = batch_size or WalletService.DUE_PAYMENTS_BATCH_SIZE
+        
+        started = time.perf_counter()
+        processed = 0
+        total_amount = Decimal('0')
+        batches = 0
+        last_id = 0
+        
+        while True:
+            payments = db.session.execute(
+                WalletService._due_payments_query(as_of, batch_size, last_id, partition)
+            ).all()
+            if not payments:
+                break
+            
+            try:
+                settled = WalletService._settle_payments(payments)
+                if not settled:
+                    # Parte do lote foi processada por outro processo: repete com os restantes
+                    db.session.rollback()
+                    continue
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Erro ao processar lote de pagamentos após o id {last_id}: {str(e)}")
+                raise
+            
+            last_id = payments[-1].id
+            processed += settled
+            total_amount += sum(payment.amount for payment in payments)
+            batches += 1
+        
+        summary = WalletService._due_payments_summary(
+            as_of, processed, total_amount, batches, time.perf_counter() - started
+        )
+        logging.info(f"Pagamentos vencidos processados (partição {partition}): {summary}")
+        return summary
+    
+    @staticmethod
+    def _due_payments_summary(as_of, processed, total_amount, batches, elapsed):
+        return {
+            'processed': processed,
+            'total_amount': format_money(total_amount),
+            'batches': batches,
+            'elapsed_seconds': round(elapsed, 3),
+            'payments_per_second': round(processed / elapsed, 1) if elapsed > 0 else None,
+            'as_of': as_of
+        }
+    
+    @staticmethod
+    def process_due_payments_parallel(as_of=None, batch_size=None, workers=4):
+        """Processa os pagamentos vencidos com vários processos, um por partição de carteiras
+        
+        Em Postgres/MySQL os processos reclamam lotes com SKIP LOCKED; o ganho depende dos
+        núcleos disponíveis para a aplicação e para a base de dados, pelo que deve ser medido
+        (o resumo inclui pagamentos/s) antes de aumentar workers. O SQLite serializa as
+        escritas, por isso aí é sempre usado um único processo.
+        """
+        as_of = as_of or datetime.utcnow()
+        if workers > 1 and db.engine.dialect.name == 'sqlite':
+            logging.warning(f"O SQLite serializa as escritas: {workers} processos não aceleram o processamento, a usar 1")
+            workers = 1
+        if workers <= 1:
+            summary = WalletService.process_due_payments(as_of, batch_size)
+            summary['workers'] = 1
+            return summary
+        
+        WalletService._provision_due_wallets(as_of)
+        engine_options = current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        database_uri = db.engine.url.render_as_string(hide_password=False)
+        # As ligações do pool não podem ser partilhadas com os processos filhos
+        db.session.remove()
+        db.engine.dispose()
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = list(executor.map(
+                _run_due_payments_partition,
+                [database_uri] * workers,
+                [engine_options] * workers,
+                [as_of] * workers,
+                [batch_size] * workers,
+                [(index, workers) for index in range(workers)]
+            ))
+        
+        summary = WalletService._due_payments_summary(
+            as_of,
+            sum(s['processed'] for s in summaries),
+            sum(Decimal(str(s['total_amount'])) for s in summaries),
+            sum(s['batches'] for s in summaries),
+            time.perf_counter() - started
+        )
+        summary['workers'] = workers
+        logging.info(f"Pagamentos vencidos processados com {workers} processos: {summary}")
+        return summary
+    
+    @staticmethod
+    def _build_payment_rows(investments, term_months, interest_rate):
+        """Calcula o plano de pagamentos de vários investimentos de uma só vez
+        
+        investments é uma lista de pares (investment_id, amount). Todos os investimentos de uma
+        solicitação partilham as mesmas datas de vencimento, que são calculadas uma única vez.
+        """
+        now = datetime.utcnow()
+        monthly_interest = Decimal(str(interest_rate)) / 100  # Converte para decimal
+        due_dates = [now + timedelta(days=30 * month) for month in range(1, term_months + 1)]
+        
+        rows = []
+        for investment_id, amount in investments:
+            # Calcula o valor mensal de juros
+            monthly_interest_amount = to_money(amount * monthly_interest)
+            
+            rows.extend({
+                'investment_id': investment_id,
+                'type': PaymentType.INTEREST,
+                'amount': monthly_interest_amount,
+                'status': PaymentStatus.PENDING,
+                'due_date': due_date,
+                'created_at': now,
+                'updated_at': now
+            } for due_date in due_dates)
+            
+            # No último mês, adiciona o pagamento do dividendo (retorno do principal)
+            rows.append({
+                'investment_id': investment_id,
+                'type': PaymentType.DIVIDEND,
+                'amount': amount,
+                'status': PaymentStatus.PENDING,
+                'due_date': due_dates[-1],
+                'created_at': now,
+                'updated_at': now
+            })
+        return rows
+    
+    @staticmethod
+    def schedule_credit_request_payments(credit_request_id):
+        """Agenda os pagamentos de todos os investimentos de uma solicitação financiada, sem commit
+        
+        Os pagamentos são inseridos com um único INSERT em lote. Retorna o número de pagamentos criados.
+        """
+        credit_request = db.session.execute(
+            select(CreditRequest.term_months, CreditRequest.interest_rate)
+            .where(CreditRequest.id == credit_request_id)
+        ).first()
+        if not credit_request:
+            raise ValueError("Solicitação de crédito não encontrada")
+        
+        investments = db.session.execute(
+            select(Investment.id, Investment.amount)
+            .where(Investment.credit_request_id == credit_request_id)
+        ).all()
+        
+        rows = WalletService._build_payment_rows(investments, credit_request.term_months, credit_request.interest_rate)
+        if rows:
+            db.session.execute(insert(Payment), rows)
+        return len(rows)
+    
     @staticmethod
     def schedule_payments(investment_id):
         """Agenda os pagamentos de dividendos/juros para um investimento"""
@@ -182,37 +573,32 @@ class WalletService:
                 raise ValueError("Investimento não encontrado")
             
             credit_request = investment.credit_request
-            term_months = credit_request.term_months
-            monthly_interest = credit_request.interest_rate / 100  # Converte para decimal
-            
-            # Calcula o valor mensal de juros
-            monthly_interest_amount = investment.amount * monthly_interest
-            
-            # Agenda os pagamentos mensais
-            for month in range(1, term_months + 1):
-                due_date = datetime.utcnow() + timedelta(days=30 * month)
-                
-                # Cria o pagamento de juros
-                interest_payment = Payment(
-                    investment_id=investment_id,
-                    type=PaymentType.INTEREST,
-                    amount=monthly_interest_amount,
-                    due_date=due_date
-                )
-                db.session.add(interest_payment)
-                
-                # No último mês, adiciona o pagamento do dividendo (retorno do principal)
-                if month == term_months:
-                    dividend_payment = Payment(
-                        investment_id=investment_id,
-                        type=PaymentType.DIVIDEND,
-                        amount=investment.amount,
-                        due_date=due_date
-                    )
-                    db.session.add(dividend_payment)
-            
+            rows = WalletService._build_payment_rows(
+                [(investment.id, investment.amount)],
+                credit_request.term_months,
+                credit_request.interest_rate
+            )
+            db.session.execute(insert(Payment), rows)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             logging.error(f"Erro ao agendar pagamentos: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+def _run_due_payments_partition(database_uri, engine_options, as_of, batch_size, partition):
+    """Ponto de entrada de cada processo de WalletService.process_due_payments_parallel
+    
+    Usa uma aplicação mínima, só com a base de dados: o processo não serve pedidos.
+    """
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=database_uri,
+        SQLALCHEMY_ENGINE_OPTIONS=engine_options
+    )
+    db.init_app(app)
+    with app.app_context():
+        try:
+            return WalletService.process_due_payments(as_of, batch_size, partition)
+        finally:
+            db.session.remove()
+            db.engine.dispose()
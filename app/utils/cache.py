@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+_MISSING = object()
+
+class CacheMetrics:
+    """Thread-safe hit/miss/invalidation counters for one cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.errors = 0
+            self.invalidations = 0
+
+    def record(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+            }
+
+class MemoryBackend:
+    """In-process LRU with a per-entry TTL. Only invalidates the current process."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Counters live outside the LRU so they are never evicted
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_counters(self, keys):
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+class RedisBackend:
+    """Backend over a Redis client (redis.Redis, or any object with the same
+    get/set/mget/incr API such as fakeredis.FakeRedis). Shared by every process, so an
+    invalidation in one worker is seen by all of them.
+
+    Values are stored as JSON through the app's JSON provider, never pickled: anyone
+    able to write to the Redis could otherwise run code in the app. Cached values must
+    therefore be JSON data; datetimes and Decimals come back as strings and floats."""
+
+    def __init__(self, client, prefix='finco:cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return _MISSING if raw is None else current_app.json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, current_app.json.dumps(value), ex=ttl or None)
+
+    def get_counters(self, keys):
+        return [int(value or 0) for value in self.client.mget([self.prefix + key for key in keys])]
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+class Cache:
+    """Read-through cache for one namespace.
+
+    Invalidation bumps a counter that is part of the stored key, instead of deleting
+    keys: old entries are simply never read again and age out by TTL/LRU. There is a
+    generation for the whole cache (invalidate()) and a version per key
+    (invalidate(key)); both are read in one round trip. get_or_set reads them before
+    computing, so a value computed from data that was invalidated meanwhile is stored
+    under the old counters and never served.
+    """
+
+    def __init__(self, name, backend, ttl):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.metrics = CacheMetrics()
+
+    def get_or_set(self, key, compute):
+        """Return the cached value for key, or compute(), store and return it.
+
+        Backend failures (e.g. Redis unavailable) fall back to compute()."""
+        try:
+            generation, version = self.backend.get_counters([
+                f"{self.name}:generation",
+                f"{self.name}:version:{key}"
+            ])
+            full_key = f"{self.name}:{generation}:{key}:{version}"
+            value = self.backend.get(full_key)
+        except Exception as e:
+            logging.warning(f"Cache {self.name} unavailable: {str(e)}")
+            self.metrics.record('errors')
+            return compute()
+
+        if value is not _MISSING:
+            self.metrics.record('hits')
+            return value
+
+        self.metrics.record('misses')
+        value = compute()
+        try:
+            self.backend.set(full_key, value, self.ttl)
+        except Exception as e:
+            logging.warning(f"Cache {self.name} unavailable: {str(e)}")
+            self.metrics.record('errors')
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one key, or every entry of this cache when key is None.
+
+        Call after the commit that changed the data."""
+        counter = f"{self.name}:generation" if key is None else f"{self.name}:version:{key}"
+        try:
+            self.backend.incr(counter)
+        except Exception as e:
+            logging.error(f"Could not invalidate cache {self.name}: {str(e)}")
+            self.metrics.record('errors')
+            return
+        self.metrics.record('invalidations')
+
+_caches_lock = threading.Lock()
+
+def _create_backend(app):
+    backend = app.config.get('CACHE_BACKEND', 'memory')
+    if backend == 'redis':
+        import redis
+        return RedisBackend(redis.Redis.from_url(app.config['CACHE_REDIS_URL']))
+    if backend == 'memory':
+        return MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+def get_cache(name, ttl=None):
+    """Return the named cache of the current app, creating it on first use.
+
+    The backend comes from CACHE_BACKEND ('memory' or 'redis' with CACHE_REDIS_URL)
+    and is shared by all caches of the app; set app.extensions['cache_backend']
+    beforehand to use another client (e.g. fakeredis in tests).
+    """
+    app = current_app._get_current_object()
+    caches = app.extensions.setdefault('caches', {})
+    cache = caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = caches.get(name)
+            if cache is None:
+                backend = app.extensions.get('cache_backend')
+                if backend is None:
+                    backend = app.extensions['cache_backend'] = _create_backend(app)
+                cache = caches[name] = Cache(name, backend, ttl or app.config.get('CACHE_DEFAULT_TTL', 60))
+    return cache
+
+def get_cache_metrics():
+    """Metrics of every cache created so far in the current app."""
+    caches = current_app.extensions.get('caches', {})
+    return {name: cache.metrics.snapshot() for name, cache in caches.items()}
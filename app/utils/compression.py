@@ -0,0 +1,62 @@
+import gzip
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+}
+
+def _available_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    # mtime=0 keeps the output (and so the bytes on the wire) deterministic
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+def compress_response(response):
+    """after_request hook: gzip/brotli-encode buffered responses above COMPRESS_MIN_SIZE.
+
+    Streamed (exports) and file responses pass through untouched, as does anything
+    already encoded or of a type that does not compress well.
+    """
+    config = current_app.config
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(_available_encodings())
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    response.set_data(_compress(data, encoding, config))
+    response.headers['Content-Encoding'] = encoding
+    # The encoded bytes differ from the identity ones, so a strong ETag no longer holds
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_compression(app):
+    if app.config.get('COMPRESS_ENABLED', True):
+        app.after_request(compress_response)
@@ -0,0 +1,33 @@
+import hashlib
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+
+def listing_etag(version):
+    """Weak ETag for a listing from its SQL version (row counts, max(updated_at), ...).
+
+    The path, query string (fields, include, cursor, ...) and the caller's identity
+    are part of the tag, so two views of the same tables never share one.
+    """
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        identity = None
+    raw = repr((request.full_path, identity, tuple(version)))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def not_modified(etag):
+    """Return a 304 response if the request's If-None-Match already has etag, else None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    return response
+
+def with_etag(rv, etag):
+    """Attach etag to a successful view return value (response or (body, status) tuple)."""
+    response = current_app.make_response(rv)
+    if response.status_code == 200:
+        response.set_etag(etag, weak=True)
+        # The client may keep the body but must revalidate before reusing it
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
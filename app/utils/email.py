@@ -1,37 +1,259 @@
-from flask import current_app, render_template
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
 from flask_mail import Message
 from app import mail
-import traceback
+import smtplib
+import threading
+import time
 
-def send_email(to, subject, template, **kwargs):
-    """Send an email with the given template to the specified recipients."""
+# Errors that only affect one message; the SMTP session is still usable
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)
+# Errors after which an SMTP connection can no longer be reused
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, OSError)
+
+INVITATION_EMAILS = {
+    'company': ("Finco - Company Registration Invitation", "emails/company_invitation"),
+    'employee': ("Finco - Employee Registration Invitation", "emails/employee_invitation"),
+}
+
+def send_message(to, subject, html):
+    """Send an already rendered HTML message. Raises on SMTP errors."""
+    msg = Message(subject, recipients=[to])
+    msg.html = html
+    mail.send(msg)
+
+def _invitation_template(app, invitation_type):
+    """Return (subject, compiled template) for the invitation type, compiling it once per app."""
+    key = 'company' if invitation_type == 'company' else 'employee'
+    templates = app.extensions.setdefault('email_templates', {})
+    if key not in templates:
+        subject, name = INVITATION_EMAILS[key]
+        templates[key] = (subject, app.jinja_env.get_template(name + '.html'))
+    return templates[key]
+
+def _invitation_context(invitation, invitation_type):
+    """Only the fields the invitation templates use."""
+    if not isinstance(invitation, dict):
+        invitation = {
+            'invitation_code': invitation.invitation_code,
+            'expires_at': invitation.expires_at
+        }
+    return {'invitation': invitation, 'invitation_type': invitation_type}
+
+class RenderMetrics:
+    """Thread-safe counters for template render time per message."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.messages = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.messages += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'messages': self.messages,
+                'total_ms': round(self.total_seconds * 1000, 3),
+                'avg_ms': round(self.total_seconds * 1000 / self.messages, 3) if self.messages else None,
+                'max_ms': round(self.max_seconds * 1000, 3)
+            }
+
+render_metrics = RenderMetrics()
+
+def _render_invitations(app, invitations, invitation_type):
+    subject, template = _invitation_template(app, invitation_type)
+    rendered = []
+    with app.app_context():
+        for invitation in invitations:
+            started = time.perf_counter()
+            html = template.render(_invitation_context(invitation, invitation_type))
+            render_metrics.record(time.perf_counter() - started)
+            rendered.append((subject, html))
+    return rendered
+
+def render_invitation_email(invitation, invitation_type):
+    """Render the invitation email for the invitation type. Returns (subject, html)."""
+    app = current_app._get_current_object()
+    return _render_invitations(app, [invitation], invitation_type)[0]
+
+_render_pool_lock = threading.Lock()
+
+def _get_render_pool(app):
+    pool = app.extensions.get('email_render_pool')
+    if pool is None:
+        with _render_pool_lock:
+            pool = app.extensions.get('email_render_pool')
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=app.config.get('MAIL_RENDER_WORKERS', 2),
+                    thread_name_prefix='email-render'
+                )
+                app.extensions['email_render_pool'] = pool
+    return pool
+
+def render_invitation_emails(invitations, invitation_type, chunk_size=None):
+    """Render invitation emails for many invitations. Returns a list of (subject, html).
+
+    Invitations may be model instances or dicts with invitation_code and
+    expires_at. The work is split in chunks and runs on a dedicated thread
+    pool (MAIL_RENDER_WORKERS), so large batches do not tie up the thread
+    serving the request any longer than waiting for the results.
+    """
+    if not invitations:
+        return []
+    app = current_app._get_current_object()
+    chunk_size = chunk_size or app.config.get('MAIL_RENDER_CHUNK_SIZE', 500)
+    if len(invitations) <= chunk_size:
+        return _render_invitations(app, invitations, invitation_type)
+
+    pool = _get_render_pool(app)
+    futures = [
+        pool.submit(_render_invitations, app, invitations[i:i + chunk_size], invitation_type)
+        for i in range(0, len(invitations), chunk_size)
+    ]
+    rendered = []
+    for future in futures:
+        rendered.extend(future.result())
+    return rendered
+
+class _PooledConnection:
+    """An open Flask-Mail connection plus the bookkeeping the pool needs."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def send(self, message):
+        self.connection.send(message)
+        self.messages_sent += 1
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.connection.__exit__(None, None, None)
+        except Exception:
+            # The server may already have dropped the connection
+            pass
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP connections open between batches.
+
+    Each connection is retired after MAIL_MAX_MESSAGES_PER_CONNECTION messages
+    (many providers cap messages per session) or once it has been idle for
+    longer than MAIL_POOL_IDLE_SECONDS (servers close idle sessions).
+    """
+
+    def __init__(self, mail, size=2, max_messages=100, idle_seconds=60):
+        self.mail = mail
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_seconds = idle_seconds
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                pooled = self._idle.pop()
+                if now - pooled.last_used < self.idle_seconds:
+                    return pooled
+                pooled.close()
+        return self.connect()
+
+    def connect(self):
+        """Open a new connection, bypassing the idle ones."""
+        return _PooledConnection(self.mail.connect().__enter__())
+
+    def release(self, pooled, broken=False):
+        if broken or (self.max_messages and pooled.messages_sent >= self.max_messages):
+            pooled.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(pooled)
+                return
+        pooled.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            pooled.close()
+
+def get_connection_pool():
+    """Return the SMTP connection pool of the current app, creating it on first use."""
+    app = current_app._get_current_object()
+    pool = app.extensions.get('smtp_pool')
+    if pool is None:
+        pool = SMTPConnectionPool(
+            mail,
+            size=app.config.get('MAIL_POOL_SIZE', 2),
+            max_messages=app.config.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100),
+            idle_seconds=app.config.get('MAIL_POOL_IDLE_SECONDS', 60)
+        )
+        app.extensions['smtp_pool'] = pool
+    return pool
+
+def send_messages(messages):
+    """Send already rendered (to, subject, html) messages over pooled connections.
+
+    Returns one entry per message: None when it was sent, or the exception
+    raised for it. A failure on one message does not stop the batch; if the
+    connection itself broke, the remaining messages go over a new one. A
+    connection that had already sent messages (e.g. one kept idle in the pool)
+    may have been closed by the server in the meantime, so when it breaks the
+    message is resent once over a new connection before it counts as failed.
+    """
+    pool = get_connection_pool()
+    results = []
+    pooled = None
     try:
-        msg = Message(subject, recipients=[to])
-        msg.html = render_template(template + '.html', **kwargs)
-        mail.send(msg)
-        print(f"Email sent successfully to {to}")
-        return True
-    except Exception as e:
-        print(f"Error sending email to {to}: {str(e)}")
-        print(traceback.format_exc())
-        return False
-
-def send_invitation_email(invitation, invitation_type):
-    """Send an invitation email based on the invitation type."""
-    if invitation_type == 'company':
-        subject = "Finco - Company Registration Invitation"
-        template = "emails/company_invitation"
-    else:  # employee
-        subject = "Finco - Employee Registration Invitation"
-        template = "emails/employee_invitation"
-    
-    success = send_email(
-        to=invitation.email,
-        subject=subject,
-        template=template,
-        invitation=invitation,
-        invitation_type=invitation_type
-    )
-    
-    print(f"Invitation email for {invitation_type} to {invitation.email}, code: {invitation.invitation_code}, success: {success}")
-    return success
+        for to, subject, html in messages:
+            msg = Message(subject, recipients=[to])
+            msg.html = html
+            retry = False
+            while True:
+                if pooled is None:
+                    try:
+                        pooled = pool.connect() if retry else pool.acquire()
+                    except Exception as e:
+                        # Could not connect: the rest of the batch fails with the same error
+                        results.extend([e] * (len(messages) - len(results)))
+                        return results
+
+                try:
+                    pooled.send(msg)
+                    results.append(None)
+                except MESSAGE_ERRORS as e:
+                    results.append(e)
+                except CONNECTION_ERRORS as e:
+                    stale = pooled.messages_sent > 0
+                    pool.release(pooled, broken=True)
+                    pooled = None
+                    if stale and not retry:
+                        retry = True
+                        continue
+                    results.append(e)
+                except Exception as e:
+                    results.append(e)
+                break
+
+            if pooled is not None and pool.max_messages and pooled.messages_sent >= pool.max_messages:
+                pool.release(pooled)
+                pooled = None
+    finally:
+        if pooled is not None:
+            pool.release(pooled)
+    return results
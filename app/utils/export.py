@@ -0,0 +1,85 @@
+import csv
+import io
+from datetime import date, datetime, time
+from flask import Response, current_app, stream_with_context
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows per database round trip and per chunk written to the socket
+EXPORT_BATCH_SIZE = 1000
+
+def parse_export_format(args):
+    """Read ?format=ndjson|csv. Returns None for the regular JSON response."""
+    export_format = (args.get('format') or 'json').strip().lower()
+    if export_format == 'json':
+        return None
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {export_format}. Use json, ndjson ou csv")
+    return export_format
+
+def _flatten(row, prefix=''):
+    """Nested dicts become dotted columns: credit_request.amount, payments_summary.total_paid"""
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return current_app.json.dumps(value)
+    return value
+
+def _ndjson_chunks(rows, batch_size):
+    dumps = current_app.json.dumps
+    lines = []
+    for row in rows:
+        lines.append(dumps(row))
+        if len(lines) >= batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def _csv_chunks(rows, batch_size):
+    buffer = io.StringIO()
+    writer = None
+    pending = 0
+    for row in rows:
+        row = _flatten(row)
+        if writer is None:
+            # The first row fixes the columns; every row of a listing has the same keys
+            writer = csv.DictWriter(buffer, fieldnames=list(row), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow({key: _csv_value(value) for key, value in row.items()})
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def stream_export(rows, export_format, filename, batch_size=EXPORT_BATCH_SIZE):
+    """Stream an iterable of row dicts as NDJSON or CSV.
+
+    rows should be a generator reading the database in batches (yield_per), so
+    neither the query result nor the response body is ever held in memory whole.
+    """
+    chunks = _csv_chunks if export_format == 'csv' else _ndjson_chunks
+    response = Response(
+        stream_with_context(chunks(rows, batch_size)),
+        mimetype=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
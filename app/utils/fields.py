@@ -0,0 +1,33 @@
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+def parse_field_selection(args, fields, includes, default_include=()):
+    """Read `?fields=` and `?include=` from the query string.
+
+    fields lists the top-level keys a client may select; includes lists the
+    expensive expansions (nested objects, child rows) it may ask for. An
+    expansion named in `fields` is included too. Returns (selected fields or
+    None for all, set of expansions). Raises ValueError on unknown names.
+    """
+    selected = _split(args.get('fields'))
+    requested = _split(args.get('include'))
+
+    unknown = [name for name in selected if name not in fields and name not in includes]
+    unknown += [name for name in requested if name not in includes]
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}")
+
+    if 'include' in args:
+        include = set(requested)
+    elif selected:
+        include = set()
+    else:
+        include = set(default_include)
+    include.update(name for name in selected if name in includes)
+    return (selected or None), include
+
+def select_fields(item, fields):
+    """Keep only the selected top-level keys of a serialized row."""
+    if not fields:
+        return item
+    return {key: value for key, value in item.items() if key in fields}
@@ -0,0 +1,58 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+def _default(value):
+    """Types both providers encode the same way: ISO 8601 datetimes and numeric Decimals."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return DefaultJSONProvider.default(value)
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's json-module provider, but with ISO 8601 datetimes (Flask uses HTTP dates)."""
+
+    default = staticmethod(_default)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson. Encodes datetimes natively, so models can hand
+    datetime objects to the response instead of pre-formatting them."""
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._options(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=_default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+JSON_PROVIDERS = {
+    'stdlib': StdlibJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+def get_json_provider_class(name='orjson'):
+    """Return the provider class for JSON_PROVIDER, falling back to stdlib without orjson."""
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON provider: {name}")
+    if name == 'orjson' and orjson is None:
+        return StdlibJSONProvider
+    return JSON_PROVIDERS[name]
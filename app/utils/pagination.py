@@ -0,0 +1,63 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(sort_value, row_id):
+    """Encode the (sort value, id) of the last row of a page into an opaque cursor."""
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        sort_value, row_id = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except Exception:
+        raise ValueError("Cursor de paginação inválido")
+
+def parse_page_args(args, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read `limit` and `cursor` from the query string. Raises ValueError on bad input."""
+    try:
+        limit = int(args.get('limit', default))
+    except (TypeError, ValueError):
+        raise ValueError("O parâmetro limit deve ser um número inteiro")
+    if limit < 1:
+        raise ValueError("O parâmetro limit deve ser maior que zero")
+    return min(limit, maximum), args.get('cursor') or None
+
+def keyset_page(query, sort_column, id_column, limit, cursor=None, descending=True):
+    """Apply (sort_column, id) keyset pagination to a query, newest first by default.
+
+    Returns the rows of the page and the cursor for the next page (None on the last page).
+    The query must select either an entity, rows whose first element is the entity, or
+    rows with columns named like sort_column and id_column.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > row_id)
+            ))
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    rows = query.limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if not hasattr(last, id_column.key):
+            last = last[0]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
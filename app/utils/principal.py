@@ -0,0 +1,138 @@
+from functools import cached_property
+from flask import current_app, g, has_app_context
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.employee import Employee
+from app.models.company import Company
+from app.utils.cache import get_cache
+
+# Models the principal caches across requests, and the columns it keeps of each: enough
+# for authorization checks, never secrets such as password_hash. A commit that updates
+# or deletes one of their rows invalidates that row's entry
+_CACHED_COLUMNS = {
+    User: ('id', 'role', 'company_id', 'is_admin', 'is_active'),
+    Employee: ('id', 'company_id'),
+    Company: ('id', 'manager_id'),
+}
+_CACHED_MODELS = tuple(_CACHED_COLUMNS)
+
+def _cache_key(model, row_id):
+    return f"{model.__tablename__}:{row_id}"
+
+def _principal_cache():
+    config = current_app.config
+    if not config.get('PRINCIPAL_CACHE_ENABLED'):
+        return None
+    return get_cache('principal', config.get('PRINCIPAL_CACHE_TTL', 30))
+
+class Snapshot:
+    """The cached columns of one row, detached from any session. row() loads the full
+    row for callers that need more, e.g. to_dict()."""
+
+    def __init__(self, model, columns):
+        self.model = model
+        self.__dict__.update(columns)
+
+    def row(self):
+        return db.session.get(self.model, self.id)
+
+def _columns(model, instance):
+    # Plain JSON data, so the cache can share it between processes without pickle
+    if instance is None:
+        return None
+    return {name: getattr(instance, name) for name in _CACHED_COLUMNS[model]}
+
+def _load(model, row_id):
+    """Snapshot of a row by primary key, through the cross-request cache when enabled."""
+    if row_id is None:
+        return None
+    cache = _principal_cache()
+    if cache is None:
+        columns = _columns(model, db.session.get(model, row_id))
+    else:
+        columns = cache.get_or_set(
+            _cache_key(model, row_id),
+            lambda: _columns(model, db.session.get(model, row_id))
+        )
+    return None if columns is None else Snapshot(model, columns)
+
+class Principal:
+    """The authenticated caller. user, employee and company are Snapshots, each loaded
+    at most once per request and only when first used; Snapshot.row() gives the full
+    row."""
+
+    def __init__(self, identity, claims):
+        self.identity = identity
+        self.claims = claims or {}
+
+    def _claim(self, name):
+        if name in self.claims:
+            return self.claims[name]
+        # Older tokens carry everything in a dict identity instead of claims
+        if isinstance(self.identity, dict):
+            return self.identity.get(name)
+        return None
+
+    @cached_property
+    def user_id(self):
+        user_id = self._claim('user_id') if isinstance(self.identity, dict) else self.identity
+        return int(user_id) if user_id is not None else None
+
+    @property
+    def role(self):
+        return self._claim('role')
+
+    @cached_property
+    def user(self):
+        return _load(User, self.user_id)
+
+    @cached_property
+    def employee(self):
+        employee_id = self._claim('employee_id')
+        if employee_id is not None:
+            return _load(Employee, employee_id)
+        # Tokens without employee_id: the employee shares the user's email
+        if self.user_id is None:
+            return None
+        employee = Employee.query.join(User, User.email == Employee.email).filter(User.id == self.user_id).first()
+        return None if employee is None else Snapshot(Employee, _columns(Employee, employee))
+
+    @cached_property
+    def company(self):
+        company_id = self._claim('company_id')
+        if company_id is None and self.user is not None:
+            company_id = self.user.company_id
+        return _load(Company, company_id)
+
+def current_principal():
+    """The Principal of the current request (requires a verified JWT)."""
+    principal = g.get('principal')
+    if principal is None:
+        principal = g.principal = Principal(get_jwt_identity(), get_jwt())
+    return principal
+
+def invalidate_principal(model, row_id):
+    cache = _principal_cache()
+    if cache is not None:
+        cache.invalidate(_cache_key(model, row_id))
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_rows(session, flush_context):
+    changed = session.info.setdefault('principal_changes', set())
+    for instance in list(session.dirty) + list(session.deleted):
+        if isinstance(instance, _CACHED_MODELS) and instance.id is not None:
+            changed.add((type(instance), instance.id))
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_changed_rows(session):
+    changed = session.info.pop('principal_changes', None)
+    if not changed or not has_app_context():
+        return
+    for model, row_id in changed:
+        invalidate_principal(model, row_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changed_rows(session):
+    session.info.pop('principal_changes', None)
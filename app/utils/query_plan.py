@@ -0,0 +1,36 @@
+import re
+from app import db
+
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+_POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+def _plan_rows(statement):
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    with db.engine.connect() as connection:
+        return [dict(row._mapping) for row in connection.exec_driver_sql(prefix + sql)]
+
+def explain(statement):
+    """Return the database's plan for a SQLAlchemy statement as text lines."""
+    dialect = db.engine.dialect.name
+    rows = _plan_rows(statement)
+    if dialect == 'sqlite':
+        return [row['detail'] for row in rows]
+    if dialect == 'postgresql':
+        return [row['QUERY PLAN'] for row in rows]
+    return [', '.join(f"{key}={value}" for key, value in row.items()) for row in rows]
+
+def full_scans(statement):
+    """Return the tables the plan reads with a full table scan (no index)."""
+    dialect = db.engine.dialect.name
+    rows = _plan_rows(statement)
+    if dialect == 'sqlite':
+        # "SCAN t USING INDEX ..." walks an index; a bare "SCAN t" reads the whole table
+        matches = (_SQLITE_SCAN.match(row['detail'].strip()) for row in rows)
+        return [m.group(1) for m in matches if m]
+    if dialect == 'postgresql':
+        return [m.group(1) for row in rows for m in _POSTGRES_SEQ_SCAN.finditer(row['QUERY PLAN'])]
+    if dialect == 'mysql':
+        return [row['table'] for row in rows if row.get('type') == 'ALL']
+    raise NotImplementedError(f"EXPLAIN not supported for {dialect}")
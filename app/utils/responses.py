@@ -0,0 +1,26 @@
+from flask import jsonify
+
+_MISSING = object()
+
+def success_response(message, data=_MISSING, status_code=200, **extra):
+    """Build the standard success envelope: status, statusCode, message and, when
+    given, data plus any extra top-level keys (total, next_cursor, ...)."""
+    body = {
+        'status': 'success',
+        'statusCode': status_code,
+        'message': message
+    }
+    if data is not _MISSING:
+        body['data'] = data
+    body.update(extra)
+    return jsonify(body), status_code
+
+def error_response(message, status_code, **extra):
+    """Build the standard error envelope."""
+    body = {
+        'status': 'error',
+        'statusCode': status_code,
+        'message': message
+    }
+    body.update(extra)
+    return jsonify(body), status_code
@@ -0,0 +1,154 @@
+"""Benchmark of `flask payments process-due` with 1..N worker processes.
+
+Seeds a database with funded credit requests and their payment schedules, then
+settles every due payment once per worker count, resetting payments and wallets
+between runs, and checks that every run credited the same totals.
+
+The database given with --database-url is DROPPED and recreated. Multi-process runs
+need Postgres or MySQL (on SQLite process_due_payments_parallel always uses one
+process), and the speed-up depends on the cores available to the workers and to
+the database server:
+
+    python benchmark_due_payments.py --database-url postgresql://user@localhost/finco_bench
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import MetaData, func, text
+
+from app import create_app, db
+from app.models.company import Company
+from app.models.credit_request import CreditRequest, CreditRequestStatus
+from app.models.employee import Employee
+from app.models.investment import Investment
+from app.models.payment import Payment, PaymentStatus
+from app.models.wallet import Wallet
+from app.models.wallet_transaction import WalletTransaction
+from app.services.wallet_service import WalletService
+from config import Config
+
+
+def seed(employees, credits_per_employee, investors_per_credit):
+    # Reflected constraints carry names, so the users/companies foreign key cycle
+    # can also be dropped on Postgres (db.drop_all() cannot)
+    metadata = MetaData()
+    metadata.reflect(db.engine)
+    metadata.drop_all(db.engine)
+    db.create_all()
+
+    company = Company(name='Benchmark', nif='000000000', email='benchmark@example.com')
+    db.session.add(company)
+    db.session.flush()
+
+    people = [
+        Employee(
+            name=f'Employee {i}',
+            email=f'employee{i}@example.com',
+            cpf=f'{i:011d}',
+            salary=1000,
+            company_id=company.id,
+            password_hash='x'
+        )
+        for i in range(employees)
+    ]
+    db.session.add_all(people)
+    db.session.flush()
+    employee_ids = [person.id for person in people]
+
+    rng = random.Random(42)
+    credit_requests = []
+    for borrower_id in employee_ids:
+        for _ in range(credits_per_employee):
+            credit_request = CreditRequest(
+                employee_id=borrower_id,
+                amount=investors_per_credit * 100,
+                term_months=6,
+                purpose='Benchmark',
+                interest_rate=0.015,
+                status=CreditRequestStatus.FUNDED
+            )
+            credit_request.funded_amount = credit_request.amount
+            credit_request.investor_count = investors_per_credit
+            credit_requests.append(credit_request)
+    db.session.add_all(credit_requests)
+    db.session.flush()
+
+    investments = []
+    for credit_request in credit_requests:
+        investors = rng.sample([i for i in employee_ids if i != credit_request.employee_id], investors_per_credit)
+        investments += [
+            Investment(employee_id=investor_id, credit_request_id=credit_request.id, amount=100)
+            for investor_id in investors
+        ]
+    db.session.add_all(investments)
+    db.session.flush()
+
+    for credit_request in credit_requests:
+        WalletService.schedule_credit_request_payments(credit_request.id)
+    db.session.commit()
+    return db.session.query(func.count(Payment.id)).scalar()
+
+
+def reset():
+    """Puts every payment back to pending and removes the wallets it credited"""
+    db.session.query(Payment).update({'status': PaymentStatus.PENDING, 'paid_at': None}, synchronize_session=False)
+    db.session.query(WalletTransaction).delete(synchronize_session=False)
+    db.session.query(Wallet).delete(synchronize_session=False)
+    db.session.commit()
+    if db.engine.dialect.name == 'postgresql':
+        # Keep the planner statistics comparable between runs
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(text('VACUUM ANALYZE'))
+
+
+def settled_totals():
+    return (
+        db.session.query(func.count(Payment.id)).filter(Payment.status == PaymentStatus.PENDING).scalar(),
+        db.session.query(func.count(WalletTransaction.id)).scalar(),
+        db.session.query(func.sum(Wallet.balance)).scalar()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', required=True, help='Database to drop, seed and benchmark')
+    parser.add_argument('--employees', type=int, default=600)
+    parser.add_argument('--credits-per-employee', type=int, default=2)
+    parser.add_argument('--investors-per-credit', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url
+        EMAIL_OUTBOX_WORKER = False
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        print(f"Seeding {args.database_url} ...")
+        payments = seed(args.employees, args.credits_per_employee, args.investors_per_credit)
+        print(f"{payments} payments, {os.cpu_count()} CPU(s)")
+
+        as_of = datetime(2100, 1, 1)
+        expected = None
+        for _ in range(args.repeat):
+            for workers in args.workers:
+                reset()
+                started = time.perf_counter()
+                summary = WalletService.process_due_payments_parallel(as_of, args.batch_size, workers)
+                elapsed = time.perf_counter() - started
+                totals = settled_totals()
+                expected = expected or totals
+                status = 'ok' if totals == expected and totals[0] == 0 else f'MISMATCH {totals}'
+                print(
+                    f"workers={workers} (used {summary['workers']}): {summary['processed']} payments "
+                    f"in {elapsed:.2f}s, {summary['processed'] / elapsed:.0f} payments/s [{status}]"
+                )
+
+
+if __name__ == '__main__':
+    main()
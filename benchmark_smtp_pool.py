@@ -0,0 +1,112 @@
+"""Benchmark of one SMTP connection per message vs the pooled send_messages().
+
+Starts a minimal SMTP server on localhost that waits --handshake-ms before greeting
+each new connection (standing in for TCP + STARTTLS + AUTH round trips), then sends
+the same messages once with send_message() and once with send_messages():
+
+    python benchmark_smtp_pool.py --messages 500 --handshake-ms 0 20 100
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+from app import create_app
+from app.utils.email import get_connection_pool, send_message, send_messages
+from config import Config
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough ESMTP for smtplib; accepts every message."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        time.sleep(self.server.handshake_seconds)
+        self.server.connections += 1
+        self.reply('220 localhost ESMTP')
+        in_data = False
+        for raw in self.rfile:
+            if in_data:
+                if raw in (b'.\r\n', b'.\n'):
+                    in_data = False
+                    self.reply('250 OK')
+                continue
+            verb = raw.strip()[:4].upper()
+            if verb == b'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif verb == b'DATA':
+                in_data = True
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif verb == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_server(handshake_seconds):
+    server = _SMTPServer(('127.0.0.1', 0), _SMTPHandler)
+    server.handshake_seconds = handshake_seconds
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(handshake_ms, count):
+    server = start_server(handshake_ms / 1000)
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        EMAIL_OUTBOX_WORKER = False
+        MAIL_SERVER = '127.0.0.1'
+        MAIL_PORT = server.server_address[1]
+        MAIL_USE_TLS = False
+        MAIL_USE_SSL = False
+        MAIL_USERNAME = None
+        MAIL_PASSWORD = None
+        MAIL_SUPPRESS_SEND = False
+        MAIL_DEBUG = False
+
+    app = create_app(BenchmarkConfig)
+    messages = [(f'user{i}@example.com', 'Finco', '<p>Olá</p>' * 50) for i in range(count)]
+    with app.app_context():
+        started = time.perf_counter()
+        for message in messages:
+            send_message(*message)
+        single = time.perf_counter() - started
+        single_connections = server.connections
+
+        started = time.perf_counter()
+        errors = [error for error in send_messages(messages) if error is not None]
+        pooled = time.perf_counter() - started
+        get_connection_pool().close_all()
+
+    server.shutdown()
+    server.server_close()
+    if errors:
+        raise SystemExit(f'{len(errors)} messages failed: {errors[0]}')
+    print(
+        f"handshake={handshake_ms:g}ms: per-message {count / single:.0f} msg/s ({single_connections} connections) "
+        f"| pooled {count / pooled:.0f} msg/s ({server.connections - single_connections} connections)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--handshake-ms', type=float, nargs='+', default=[0, 20, 100])
+    args = parser.parse_args()
+    for handshake_ms in args.handshake_ms:
+        run(handshake_ms, args.messages)
+
+
+if __name__ == '__main__':
+    main()
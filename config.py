@@ -11,6 +11,28 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     DEBUG = True
     
+    # JSON encoder for responses: 'orjson' (falls back to 'stdlib' if orjson is not installed)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    
+    # Response compression (gzip, or brotli when the brotli package is installed)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+    
+    # Cache for hot read paths: 'memory' (per-process LRU) or 'redis' (shared by all workers)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 60))
+    # Opportunities feed: invalidated on approval and investment; the TTL bounds staleness
+    # for other changes (and across processes with the memory backend)
+    OPPORTUNITIES_CACHE_TTL = int(os.environ.get('OPPORTUNITIES_CACHE_TTL', 30))
+    # Authenticated user/employee/company rows shared across requests (off by default);
+    # committed updates invalidate them, the TTL bounds staleness for bulk UPDATEs
+    PRINCIPAL_CACHE_ENABLED = os.environ.get('PRINCIPAL_CACHE_ENABLED', 'false').lower() in ['true', 'on', '1']
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', 30))
+    
     # Email configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -19,6 +41,22 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@finco.com')
     FINCO_ADMIN = os.environ.get('FINCO_ADMIN', 'admin@finco.com')
+    
+    # SMTP connection pool: open connections kept between batches and
+    # messages sent per connection before it is recycled
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 2))
+    MAIL_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100))
+    MAIL_POOL_IDLE_SECONDS = int(os.environ.get('MAIL_POOL_IDLE_SECONDS', 60))
+    
+    # Email rendering: bulk renders are split in chunks on a dedicated thread pool
+    MAIL_RENDER_WORKERS = int(os.environ.get('MAIL_RENDER_WORKERS', 2))
+    MAIL_RENDER_CHUNK_SIZE = int(os.environ.get('MAIL_RENDER_CHUNK_SIZE', 500))
+    
+    # Email outbox: background sender and retry policy
+    EMAIL_OUTBOX_WORKER = os.environ.get('EMAIL_OUTBOX_WORKER', 'true').lower() in ['true', 'on', '1']
+    EMAIL_OUTBOX_POLL_SECONDS = int(os.environ.get('EMAIL_OUTBOX_POLL_SECONDS', 10))
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 30))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -1,4 +1,5 @@
 from app import create_app, db
+from flask_migrate import stamp
 
 def init_database():
     """Initialize the database with all tables from models."""
@@ -12,6 +13,9 @@ def init_database():
         print("Creating all tables from models...")
         db.create_all()
         
+        # Tables already match the models, so mark every migration as applied
+        stamp()
+        
         print("Database tables created successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+"""add funding totals to credit_requests
+
+Revision ID: a1c3e5f70b21
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f70b21'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('credit_requests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('funded_amount', sa.Float(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('investor_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the investments table
+    op.execute("""
+        UPDATE credit_requests SET
+            funded_amount = COALESCE((
+                SELECT SUM(investments.amount) FROM investments
+                WHERE investments.credit_request_id = credit_requests.id
+            ), 0),
+            investor_count = (
+                SELECT COUNT(DISTINCT investments.employee_id) FROM investments
+                WHERE investments.credit_request_id = credit_requests.id
+            )
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('credit_requests', schema=None) as batch_op:
+        batch_op.drop_column('investor_count')
+        batch_op.drop_column('funded_amount')
@@ -0,0 +1,60 @@
+"""store money as integer cents
+
+Revision ID: b7d2f4a91c38
+Revises: a1c3e5f70b21
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4a91c38'
+down_revision = 'a1c3e5f70b21'
+branch_labels = None
+depends_on = None
+
+
+# (table, column, nullable)
+MONEY_COLUMNS = [
+    ('credit_requests', 'amount', False),
+    ('credit_requests', 'funded_amount', False),
+    ('investments', 'amount', False),
+    ('payments', 'amount', False),
+    ('wallets', 'balance', True),
+    ('wallet_transactions', 'amount', False),
+    ('employees', 'salary', False),
+]
+
+
+# Exact intermediate type for the x100 / /100 conversions. Arithmetic on the Float
+# column would be stored back single-precision on MySQL (FLOAT), losing cents above
+# ~167 772 kwanza; DECIMAL keeps every cent
+DECIMAL = sa.Numeric(20, 2)
+
+
+def _alter_type(table, column, nullable, existing_type, type_, using=None):
+    with op.batch_alter_table(table, schema=None) as batch_op:
+        batch_op.alter_column(
+            column,
+            existing_type=existing_type,
+            type_=type_,
+            existing_nullable=nullable,
+            postgresql_using=using
+        )
+
+
+def upgrade():
+    for table, column, nullable in MONEY_COLUMNS:
+        # Float -> DECIMAL rounds each stored value to the nearest cent
+        _alter_type(table, column, nullable, sa.Float(), DECIMAL, f'ROUND({column}::numeric, 2)')
+        op.execute(f"UPDATE {table} SET {column} = ROUND({column} * 100)")
+        _alter_type(table, column, nullable, DECIMAL, sa.BigInteger(), f'{column}::bigint')
+
+
+def downgrade():
+    for table, column, nullable in MONEY_COLUMNS:
+        _alter_type(table, column, nullable, sa.BigInteger(), DECIMAL)
+        op.execute(f"UPDATE {table} SET {column} = {column} / 100.0")
+        _alter_type(table, column, nullable, DECIMAL, sa.Float())
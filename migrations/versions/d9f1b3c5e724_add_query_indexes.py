@@ -0,0 +1,52 @@
+"""add composite indexes for service queries
+
+Revision ID: d9f1b3c5e724
+Revises: c4e8a2d6f913
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f1b3c5e724'
+down_revision = 'c4e8a2d6f913'
+branch_labels = None
+depends_on = None
+
+
+# (table, index name, columns, unique)
+INDEXES = [
+    ('credit_requests', 'ix_credit_requests_employee_id_status', ['employee_id', 'status'], False),
+    ('credit_requests', 'ix_credit_requests_status_created_at', ['status', 'created_at'], False),
+    ('investments', 'ix_investments_credit_request_id_employee_id', ['credit_request_id', 'employee_id'], False),
+    ('investments', 'ix_investments_employee_id', ['employee_id'], False),
+    ('payments', 'ix_payments_investment_id_status_due_date', ['investment_id', 'status', 'due_date'], False),
+    ('payments', 'ix_payments_status_due_date', ['status', 'due_date'], False),
+    ('wallet_transactions', 'ix_wallet_transactions_wallet_id_created_at', ['wallet_id', 'created_at'], False),
+    ('wallets', 'ix_wallets_employee_id', ['employee_id'], True),
+    ('employees', 'ix_employees_company_id', ['company_id'], False),
+    ('employee_invitations', 'ix_employee_invitations_company_id_created_at', ['company_id', 'created_at'], False),
+    ('employee_invitations', 'ix_employee_invitations_company_id_email', ['company_id', 'email'], False),
+]
+
+
+def upgrade():
+    # The unique wallet index fails on duplicates; report them instead of guessing which balance wins
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT employee_id, COUNT(*) FROM wallets GROUP BY employee_id HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        employees = ', '.join(str(row[0]) for row in duplicates)
+        raise RuntimeError(f"Funcionários com mais de uma carteira (fundir antes de migrar): {employees}")
+
+    for table, name, columns, unique in INDEXES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(name, columns, unique=unique)
+
+
+def downgrade():
+    for table, name, columns, unique in reversed(INDEXES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(name)
@@ -0,0 +1,25 @@
+"""index wallet transactions by type
+
+Revision ID: e2a7c9d4b816
+Revises: d9f1b3c5e724
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c9d4b816'
+down_revision = 'd9f1b3c5e724'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('wallet_transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_wallet_transactions_wallet_id_type_created_at', ['wallet_id', 'type', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('wallet_transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_wallet_transactions_wallet_id_type_created_at')
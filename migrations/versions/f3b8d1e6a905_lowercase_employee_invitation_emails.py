@@ -0,0 +1,29 @@
+"""lowercase employee invitation emails
+
+Revision ID: f3b8d1e6a905
+Revises: e2a7c9d4b816
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1e6a905'
+down_revision = 'e2a7c9d4b816'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Invitations are now written lowercase, so lookups can use a plain
+    # email IN (...) on ix_employee_invitations_company_id_email
+    op.execute(
+        "UPDATE employee_invitations SET email = LOWER(TRIM(email)) "
+        "WHERE email <> LOWER(TRIM(email))"
+    )
+
+
+def downgrade():
+    # The original spelling is not kept; lowercase emails are valid for the old code
+    pass
@@ -0,0 +1,69 @@
+"""Shared fixtures: an app on a temporary SQLite file, or on TEST_DATABASE_URL.
+
+With TEST_DATABASE_URL (e.g. a Postgres database) the tables in that database are
+dropped and recreated by every test that uses the app.
+"""
+import os
+
+import pytest
+from sqlalchemy import MetaData
+
+from app import create_app, db
+from config import Config
+
+
+def drop_tables():
+    # users and companies reference each other through unnamed foreign keys, which
+    # db.drop_all() cannot drop on Postgres; reflected constraints carry their names
+    metadata = MetaData()
+    metadata.reflect(db.engine)
+    metadata.drop_all(db.engine)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return os.environ.get('TEST_DATABASE_URL') or f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def app_factory(database_url):
+    """Build apps on the test database; the first one creates the tables.
+
+    Keyword arguments override the test configuration, e.g. app_factory(EMAIL_MAX_ATTEMPTS=2).
+    """
+    apps = []
+
+    def factory(**overrides):
+        class TestConfig(Config):
+            SQLALCHEMY_DATABASE_URI = database_url
+            TESTING = True
+            DEBUG = False
+            MAIL_SUPPRESS_SEND = True
+            EMAIL_OUTBOX_WORKER = False
+            # SQLite serializes writers: wait for the lock instead of failing at once
+            SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}} if database_url.startswith('sqlite') else {}
+
+        for name, value in overrides.items():
+            setattr(TestConfig, name, value)
+
+        app = create_app(TestConfig)
+        if not apps:
+            with app.app_context():
+                drop_tables()
+                db.create_all()
+        apps.append(app)
+        return app
+
+    yield factory
+
+    for index, app in enumerate(apps):
+        with app.app_context():
+            db.session.remove()
+            if index == 0:
+                drop_tables()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(app_factory):
+    return app_factory()
@@ -0,0 +1,168 @@
+"""Email outbox against a local SMTP stand-in.
+
+Messages queued in the outbox are delivered by EmailService.drain_outbox; a message the
+server refuses stays pending with an exponential backoff until EMAIL_MAX_ATTEMPTS, and
+the background sender started by create_app drains what was left from a previous run.
+"""
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.email_outbox import EmailOutbox, EmailStatus
+from app.services.email_service import EmailService, _OutboxWorker
+
+REJECTED = 'bounce@example.com'
+RETRY_BASE_SECONDS = 30
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough ESMTP for smtplib; refuses RCPT TO:<REJECTED> with 550."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 localhost ESMTP')
+        recipients, in_data = [], False
+        for raw in self.rfile:
+            if in_data:
+                if raw in (b'.\r\n', b'.\n'):
+                    in_data = False
+                    self.server.delivered.extend(recipients)
+                    recipients = []
+                    self.reply('250 OK')
+                continue
+            command = raw.strip().decode()
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip(' <>')
+                if address == REJECTED:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                in_data = True
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+@pytest.fixture
+def smtp_server():
+    server = _SMTPServer(('127.0.0.1', 0), _SMTPHandler)
+    server.delivered = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mail_config(smtp_server):
+    return {
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': smtp_server.server_address[1],
+        'MAIL_USE_TLS': False,
+        'MAIL_USE_SSL': False,
+        'MAIL_USERNAME': None,
+        'MAIL_PASSWORD': None,
+        'MAIL_SUPPRESS_SEND': False,
+        'EMAIL_MAX_ATTEMPTS': 3,
+        'EMAIL_RETRY_BASE_SECONDS': RETRY_BASE_SECONDS,
+    }
+
+
+def _queue(recipients):
+    EmailService.queue_emails([(to, 'Finco', '<p>Olá</p>') for to in recipients])
+    db.session.commit()
+
+
+def _make_due(message):
+    message.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_drain_delivers_and_backs_off(app_factory, mail_config, smtp_server):
+    app = app_factory(**mail_config)
+    recipients = ['a@example.com', 'b@example.com', 'c@example.com']
+
+    with app.app_context():
+        _queue(recipients + [REJECTED])
+
+        summary = EmailService.drain_all()
+        assert summary == {'sent': 3, 'retried': 1, 'failed': 0, 'claimed': 4}
+        assert sorted(smtp_server.delivered) == recipients
+        sent = EmailOutbox.query.filter_by(status=EmailStatus.SENT).all()
+        assert len(sent) == 3 and all(m.sent_at and m.attempts == 1 for m in sent)
+
+        bounced = EmailOutbox.query.filter_by(recipient=REJECTED).one()
+        assert bounced.status == EmailStatus.PENDING
+        assert bounced.attempts == 1
+        assert bounced.claim_token is None
+        assert '550' in bounced.last_error
+        delay = (bounced.next_attempt_at - datetime.utcnow()).total_seconds()
+        assert RETRY_BASE_SECONDS - 5 < delay <= RETRY_BASE_SECONDS
+
+        # Not due yet: nothing is claimed
+        assert EmailService.drain_all()['claimed'] == 0
+
+        # Second attempt: the delay doubles
+        _make_due(bounced)
+        assert EmailService.drain_all()['retried'] == 1
+        db.session.refresh(bounced)
+        assert bounced.attempts == 2
+        delay = (bounced.next_attempt_at - datetime.utcnow()).total_seconds()
+        assert 2 * RETRY_BASE_SECONDS - 5 < delay <= 2 * RETRY_BASE_SECONDS
+
+        # Third attempt reaches EMAIL_MAX_ATTEMPTS
+        _make_due(bounced)
+        assert EmailService.drain_all()['failed'] == 1
+        db.session.refresh(bounced)
+        assert bounced.status == EmailStatus.FAILED
+        assert bounced.attempts == 3
+        assert sorted(smtp_server.delivered) == recipients
+
+
+def test_worker_started_by_create_app_drains_pending_messages(app_factory, mail_config, smtp_server):
+    # Messages left in the outbox by a previous run, with no sender running
+    previous = app_factory(**mail_config)
+    with previous.app_context():
+        _queue(['a@example.com', 'b@example.com'])
+
+    # A restarted (non-test) app starts the sender without anyone calling wake_worker
+    app = app_factory(**mail_config, TESTING=False, EMAIL_OUTBOX_WORKER=True, EMAIL_OUTBOX_POLL_SECONDS=1)
+    worker = _OutboxWorker._instances.get(id(app))
+    assert worker is not None and worker.is_alive()
+    try:
+        deadline = time.monotonic() + 10
+        while len(smtp_server.delivered) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        worker.stop()
+        worker.join(timeout=10)
+
+    assert sorted(smtp_server.delivered) == ['a@example.com', 'b@example.com']
+    with app.app_context():
+        assert {m.status for m in EmailOutbox.query.all()} == {EmailStatus.SENT}
+
+
+def test_worker_not_started_in_tests(app_factory):
+    app = app_factory(EMAIL_OUTBOX_WORKER=True)
+    assert EmailService.start_worker(app) is None
+    assert id(app) not in _OutboxWorker._instances
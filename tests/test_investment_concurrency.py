@@ -0,0 +1,132 @@
+"""Stress test for the guarded funding UPDATE in InvestmentService.create_investment.
+
+Many threads, each with its own app context and database connection, invest in the
+same credit request at once; the total offered is well above the amount requested.
+A short pause before each UPDATE of credit_requests widens the window between the
+availability check and the write, so without the guard in the UPDATE's WHERE clause
+the request ends over-funded. Afterwards the request must not be over-funded and
+funded_amount/investor_count must match the investments table (which is what
+`flask funding verify` checks).
+
+Runs against a temporary SQLite file by default. Set TEST_DATABASE_URL to run it
+against Postgres/MySQL instead; the tables in that database are dropped and recreated.
+
+    python -m pytest -q tests/test_investment_concurrency.py
+"""
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from flask_sqlalchemy.session import Session
+from sqlalchemy import func
+from sqlalchemy.sql import Update
+
+from app import db
+from app.models.company import Company
+from app.models.credit_request import CreditRequest, CreditRequestStatus
+from app.models.employee import Employee
+from app.models.investment import Investment
+from app.services.investment_service import InvestmentService
+
+THREADS = 16
+INVESTMENTS_PER_THREAD = 10
+CREDIT_AMOUNT = 10000
+# Mixed sizes, so interleaved investments can overshoot the amount requested;
+# 16 * 10 * 125 = 20000 offered on average for 10000 requested
+INVESTMENT_AMOUNTS = (100, 150)
+
+
+def _seed(app):
+    with app.app_context():
+        company = Company(name='Finco', nif='500000000', email='finco@example.com')
+        db.session.add(company)
+        db.session.flush()
+
+        borrower, *investors = [
+            Employee(
+                name=f'Funcionário {i}',
+                email=f'employee{i}@example.com',
+                cpf=f'{i:011d}',
+                salary=1000,
+                company_id=company.id,
+                password_hash='x'
+            )
+            for i in range(THREADS + 1)
+        ]
+        db.session.add_all([borrower, *investors])
+        db.session.flush()
+
+        credit_request = CreditRequest(
+            employee_id=borrower.id,
+            amount=CREDIT_AMOUNT,
+            term_months=6,
+            purpose='Teste de concorrência',
+            interest_rate=0.015,
+            status=CreditRequestStatus.APPROVED
+        )
+        db.session.add(credit_request)
+        db.session.commit()
+        return credit_request.id, [investor.id for investor in investors]
+
+
+@pytest.fixture
+def slow_credit_updates(monkeypatch):
+    """Pause before every UPDATE on credit_requests so concurrent investors interleave"""
+    execute = Session.execute
+
+    def delayed_execute(self, statement, *args, **kwargs):
+        if isinstance(statement, Update) and statement.table.name == 'credit_requests':
+            time.sleep(0.005)
+        return execute(self, statement, *args, **kwargs)
+
+    monkeypatch.setattr(Session, 'execute', delayed_execute)
+
+
+def test_concurrent_investments_never_over_fund(app, slow_credit_updates):
+    credit_request_id, investor_ids = _seed(app)
+    barrier = threading.Barrier(len(investor_ids))
+    results = []
+    results_lock = threading.Lock()
+
+    def invest(employee_id, amount):
+        with app.app_context():
+            barrier.wait()
+            for _ in range(INVESTMENTS_PER_THREAD):
+                result = InvestmentService.create_investment(employee_id, credit_request_id, amount)
+                with results_lock:
+                    results.append(result)
+            db.session.remove()
+
+    threads = [
+        threading.Thread(target=invest, args=(employee_id, INVESTMENT_AMOUNTS[i % len(INVESTMENT_AMOUNTS)]))
+        for i, employee_id in enumerate(investor_ids)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    created = [r for r in results if isinstance(r, dict)]
+    rejected = [r for r in results if not isinstance(r, dict)]
+    assert len(results) == THREADS * INVESTMENTS_PER_THREAD
+    # Every rejection is the expected "no longer available" answer, not a database error
+    assert all(status == 400 for _, status in rejected), rejected
+
+    with app.app_context():
+        credit_request = db.session.get(CreditRequest, credit_request_id)
+        invested, investor_count = db.session.query(
+            func.coalesce(func.sum(Investment.amount), 0),
+            func.count(func.distinct(Investment.employee_id))
+        ).filter(Investment.credit_request_id == credit_request_id).one()
+
+        assert credit_request.funded_amount <= credit_request.amount
+        assert Decimal(invested) == credit_request.funded_amount
+        assert investor_count == credit_request.investor_count
+        assert sum(Decimal(r['amount']) for r in created) == credit_request.funded_amount
+        # The offer far exceeds the request: at most less than one investment is left over
+        assert credit_request.amount - credit_request.funded_amount < min(INVESTMENT_AMOUNTS)
+        assert (credit_request.status == CreditRequestStatus.FUNDED) == (credit_request.funded_amount == credit_request.amount)
+
+    result = app.test_cli_runner().invoke(args=['funding', 'verify'])
+    assert result.exit_code == 0, result.output
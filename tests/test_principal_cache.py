@@ -0,0 +1,109 @@
+"""Principal cache on the Redis backend.
+
+Only the columns listed in _CACHED_COLUMNS are stored, as JSON; a pickle planted in the
+shared Redis is never loaded.
+"""
+import json
+import pickle
+
+import pytest
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.utils.cache import RedisBackend, get_cache
+from app.utils.principal import Principal
+
+PREFIX = 'finco:cache:'
+unpickled = []
+
+
+class _RedisClient:
+    """In-memory stand-in with the redis.Redis calls RedisBackend makes."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+class _Payload:
+    def __reduce__(self):
+        return unpickled.append, ('payload ran',)
+
+
+@pytest.fixture
+def redis_client():
+    return _RedisClient()
+
+
+@pytest.fixture
+def cached_app(app_factory, redis_client):
+    app = app_factory(PRINCIPAL_CACHE_ENABLED=True)
+    app.extensions['cache_backend'] = RedisBackend(redis_client, prefix=PREFIX)
+    with app.app_context():
+        company = Company(name='Finco', nif='123456789', email='finco@example.com')
+        db.session.add(company)
+        db.session.flush()
+        user = User(name='Ana', email='ana@example.com', password='secret', role='manager', company_id=company.id)
+        db.session.add(user)
+        db.session.commit()
+        yield app, user.id, company.id
+
+
+def _principal(user_id):
+    db.session.expunge_all()
+    return Principal(user_id, {'role': 'manager'})
+
+
+def test_only_authorization_columns_are_cached_as_json(cached_app, redis_client):
+    app, user_id, company_id = cached_app
+
+    user = _principal(user_id).user
+    assert (user.id, user.role, user.company_id, user.is_admin, user.is_active) == (user_id, 'manager', company_id, False, True)
+    assert _principal(user_id).company.id == company_id
+
+    stored = {key: json.loads(value) for key, value in redis_client.data.items() if b'{' in value}
+    assert stored[f'{PREFIX}principal:0:users:{user_id}:0'] == {
+        'id': user_id, 'role': 'manager', 'company_id': company_id, 'is_admin': False, 'is_active': True
+    }
+    assert all('password_hash' not in columns for columns in stored.values())
+
+    # A second request is served from the cache; row() still gives the full row
+    metrics = get_cache('principal').metrics
+    hits = metrics.snapshot()['hits']
+    principal = _principal(user_id)
+    assert principal.user.role == 'manager'
+    assert metrics.snapshot()['hits'] == hits + 1
+    assert principal.user.row().to_dict()['email'] == 'ana@example.com'
+
+
+def test_pickle_in_redis_is_never_loaded(cached_app, redis_client):
+    app, user_id, company_id = cached_app
+    redis_client.data[f'{PREFIX}principal:0:users:{user_id}:0'] = pickle.dumps(_Payload())
+
+    user = _principal(user_id).user
+    assert unpickled == []
+    assert user.role == 'manager'
+    assert get_cache('principal').metrics.snapshot()['errors'] == 1
+
+
+def test_commit_invalidates_cached_columns(cached_app):
+    app, user_id, company_id = cached_app
+    assert _principal(user_id).user.is_admin is False
+
+    db.session.get(User, user_id).is_admin = True
+    db.session.commit()
+
+    assert _principal(user_id).user.is_admin is True